@@ -1,16 +1,7 @@
 import numpy as np
-from scipy.optimize import fmin_slsqp
-import pandas as pd
-import os
-import seaborn as sns
-from matplotlib import pyplot as plt
-import warnings
-import argparse
-
-plt.close('all')
-sns.set_theme()
-warnings.filterwarnings("ignore", category=RuntimeWarning)  ## supress runtime warnings
-
+import sys
+from functools import lru_cache
+from solvers import find_root, find_root_sweep, solve_bracketed, solve_unique
 
 '''
 Reference: S Ryan, EL Christiansen. 2011. "A ballistic limit analysis programme
@@ -24,60 +15,163 @@ code may vary slightly from those calculated using the Ballistic Limit Analysis
 described in NASA/TM-2009-214789.
 '''
 
+## configuration inputs that the regime anchors depend on (see JSCwhipple_anchors)
+ANCHOR_INPUTS = ('angle','bumper_thick','bumper_density','standoff','wall_thick','wall_yield','proj_density','AD_MLI','S_MLI')
+
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 def JSCwhipple_performance(row):
     '''
     Function to calculate the critical projectile diameter using the JSC Whipple shield performance BLE
     '''
 
+    ## velocity-independent terms, solved once per configuration
+    anglerad, tb_tot, delta_dcHV, vLV, vHV, dcLV, dcHV = JSCwhipple_anchors(*[float(row[col]) for col in ANCHOR_INPUTS])
+
+    ## Ballistic limit calculation               
+    if row['velocity'] <= vLV:  # low velocity regime
+        dc = ((row['wall_thick']*(row['wall_yield']/40)**0.5+tb_tot)/(0.6*(np.cos(anglerad))**(5/3)*row['proj_density']**0.5*row['velocity']**(2/3)))**(18/19)
+    elif row['velocity'] >= vHV:  # hypervelocity regime
+        dc = dc_HV(tb_tot,row['wall_thick'],row['standoff'],row['wall_yield'],row['proj_density'],row['bumper_density'],anglerad,row['velocity'],vHV) + delta_dcHV
+    else:  # shatter regime
+        dc = dcLV+(dcHV-dcLV)/(vHV-vLV)*(row['velocity']-vLV)    
+
+    return dc
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+@lru_cache(maxsize=4096)
+def JSCwhipple_anchors(angle,bumper_thick,bumper_density,standoff,wall_thick,wall_yield,proj_density,AD_MLI,S_MLI):
+    '''
+    Function to calculate the velocity-independent terms of JSCwhipple_performance: the
+    MLI-adjusted bumper thickness, the regime transition velocities, and the shatter regime
+    anchors dcLV(vLV) and dcHV(vHV). Results are memoised on the configuration (arguments
+    as listed in ANCHOR_INPUTS); hit/miss statistics are given by JSCwhipple_anchors.cache_info()
+    '''
+
     ## define the obliquity limit and convert to radians
-    angledeg = 65 if row['angle'] > 65 else row['angle']
+    angledeg = 65 if angle > 65 else angle
     anglerad = np.deg2rad(angledeg)
 
     ## account for the presence of MLI
-    if row['S_MLI'] > 0:  # internal MLI
+    if S_MLI > 0:  # internal MLI
         K_MLI = 1.4
         vLV = 2.0/np.cos(anglerad)
-        delta_dcHV = K_MLI*row['AD_MLI']*(row['S_MLI']/row['standoff'])**(1/2)
-        tb_tot = row['bumper_thick']
+        delta_dcHV = K_MLI*AD_MLI*(S_MLI/standoff)**(1/2)
+        tb_tot = bumper_thick
     else:  # external MLI
         K_MLI = 3
-        if row['AD_MLI'] > 0:
+        if AD_MLI > 0:
             rho_ref = 2.78
-            tb_tot = row['bumper_thick']+K_MLI*row['AD_MLI']/rho_ref
+            tb_tot = bumper_thick+K_MLI*AD_MLI/rho_ref
         else:
-            tb_tot = row['bumper_thick']
-        vLV = vLV_solve_piek(tb_tot,row['wall_thick'],row['proj_density'],row['wall_yield'],anglerad)/np.cos(anglerad)
+            tb_tot = bumper_thick
+        vLV = vLV_solve_piek(tb_tot,wall_thick,proj_density,wall_yield,anglerad)/np.cos(anglerad)
         delta_dcHV = 0
 
     # define the velocity regime transitions
     vHV = 7.0/np.cos(anglerad)
 
-    ## Ballistic limit calculation               
-    if row['velocity'] <= vLV:  # low velocity regime
-        dc = ((row['wall_thick']*(row['wall_yield']/40)**0.5+tb_tot)/(0.6*(np.cos(anglerad))**(5/3)*row['proj_density']**0.5*row['velocity']**(2/3)))**(18/19)
-    elif row['velocity'] >= vHV:  # hypervelocity regime
-        dc = dc_HV(tb_tot,row['wall_thick'],row['standoff'],row['wall_yield'],row['proj_density'],row['bumper_density'],anglerad,row['velocity'],vHV) + delta_dcHV
-    else:  # shatter regime
-        dcLV = ((row['wall_thick']*(row['wall_yield']/40)**0.5+tb_tot)/(0.6*(np.cos(anglerad))**(5/3)*row['proj_density']**0.5*vLV**(2/3)))**(18/19)
-        dcHV = dc_HV(tb_tot,row['wall_thick'],row['standoff'],row['wall_yield'],row['proj_density'],row['bumper_density'],anglerad,vHV,vHV) + delta_dcHV
-        dc = dcLV+(dcHV-dcLV)/(vHV-vLV)*(row['velocity']-vLV)    
+    ## shatter regime anchors
+    dcLV = ((wall_thick*(wall_yield/40)**0.5+tb_tot)/(0.6*(np.cos(anglerad))**(5/3)*proj_density**0.5*vLV**(2/3)))**(18/19)
+    dcHV = dc_HV(tb_tot,wall_thick,standoff,wall_yield,proj_density,bumper_density,anglerad,vHV,vHV) + delta_dcHV
 
-    return dc
+    return anglerad, tb_tot, delta_dcHV, vLV, vHV, dcLV, dcHV
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+@np.errstate(divide='ignore', invalid='ignore', over='ignore')
+def JSCwhipple_performance_vec(df, sweep=False, return_iterations=False, return_converged=False):
+    '''
+    Array form of JSCwhipple_performance. Takes a DataFrame (or any mapping of column
+    name to array) and returns the critical diameter of every row as a numpy array. vLV
+    and the shatter anchor dcHV(vHV) are solved once per unique configuration and the
+    hypervelocity diameters for all hypervelocity rows together. With sweep=True and a
+    (configuration, velocity) grid (e.g. a ConfigSet) the hypervelocity diameters are
+    solved by continuation along the velocities (see find_root_sweep). With
+    return_iterations=True the solver iterations of every point (0 outside the
+    hypervelocity regime) are returned as well, and with return_converged=True a boolean
+    array flagging the points whose hypervelocity solve (or, in the shatter regime, the
+    solve of the dcHV anchor) converged, e.g. False where the root falls on the
+    tb/dp,crit step at S/dp = 30. The outputs are returned in the order dc, iterations,
+    converged
+    '''
+
+    ## extract the inputs as arrays
+    angle,bumper_thick,bumper_density,standoff,wall_thick,wall_yield,proj_density,AD_MLI,S_MLI = [np.asarray(df[col],dtype=float) for col in ANCHOR_INPUTS]
+    velocity = np.asarray(df['velocity'],dtype=float)
+
+    ## define the obliquity limit and convert to radians
+    anglerad = np.deg2rad(np.minimum(angle,65))
+    cosang = np.cos(anglerad)
+
+    ## account for the presence of MLI (internal if S_MLI > 0, otherwise external)
+    internal = S_MLI > 0
+    K_MLI = np.where(internal, 1.4, 3)
+    rho_ref = 2.78
+    tb_tot = np.where(~internal & (AD_MLI > 0), bumper_thick+K_MLI*AD_MLI/rho_ref, bumper_thick)
+    delta_dcHV = np.where(internal, K_MLI*AD_MLI*(S_MLI/standoff)**(1/2), 0)
+
+    # define the velocity regime transitions
+    vLV = np.where(internal, 2.0, solve_unique(vLV_solve_piek_vec,tb_tot,wall_thick,proj_density,wall_yield,anglerad))/cosang
+    vHV = 7.0/cosang
+
+    ## shatter regime anchors
+    dc_low = lambda vel: ((wall_thick*(wall_yield/40)**0.5+tb_tot)/(0.6*cosang**(5/3)*proj_density**0.5*vel**(2/3)))**(18/19)
+    dcLV = dc_low(vLV)
+    anchor = solve_unique(dc_HV_vec,tb_tot,wall_thick,standoff,wall_yield,proj_density,bumper_density,anglerad,vHV,vHV)
+    dcHV = anchor[0] + delta_dcHV
+
+    ## Ballistic limit calculation
+    shape = np.broadcast(dcLV,dcHV,velocity).shape
+    low = np.broadcast_to(velocity <= vLV, shape)
+    high = np.broadcast_to(~(velocity <= vLV) & (velocity >= vHV), shape)
+    dc = np.where(low, dc_low(velocity), dcLV+(dcHV-dcLV)/(vHV-vLV)*(velocity-vLV))
+    iterations = np.zeros(shape, dtype=int)
+    converged = np.array(np.broadcast_to(low | high | anchor[1], shape))
+    if high.any() and sweep and len(shape) == 2:
+        inputs = [np.broadcast_to(x, shape) for x in (tb_tot,wall_thick,standoff,wall_yield,proj_density,bumper_density,anglerad,velocity,vHV)]
+        result = dc_HV_vec(*inputs,sweep=True,active=high)
+        dc[high] = result.root[high] + np.broadcast_to(delta_dcHV, shape)[high]
+        iterations[high] = result.iterations[high]
+        converged[high] = result.converged[high]
+    elif high.any():
+        inputs = [np.broadcast_to(x, shape)[high] for x in (tb_tot,wall_thick,standoff,wall_yield,proj_density,bumper_density,anglerad,velocity,vHV)]
+        result = dc_HV_vec(*inputs)
+        dc[high] = result.root + np.broadcast_to(delta_dcHV, shape)[high]
+        iterations[high] = result.iterations
+        converged[high] = result.converged
+
+    outputs = [dc]+[iterations]*return_iterations+[converged]*return_converged
+    return tuple(outputs) if len(outputs) > 1 else dc
 
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 def vLV_solve_piek(tb,tw,rhop,sigyksi,anglerad):
     '''
     Function to calculate the low-to-shatter regime transition velocity
-    '''    
-      
-    func = lambda x: np.sqrt(((tb/(x/1.436)**(1/3))**2-\
-          (((tw*(sigyksi/40)**0.5+tb)/(0.6*(np.cos(anglerad))**(5/3)*rhop**0.5*np.abs(x)**(2/3)))**(18/19))**2)**2)
-            
-    vLV = fmin_slsqp(func,3.0, bounds=[(1.854,50.0)],disp=False)[0]
+    (single-point wrapper around vLV_solve_piek_vec)
+    '''
+
+    return float(vLV_solve_piek_vec(tb,tw,rhop,sigyksi,anglerad))
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def vLV_solve_piek_vec(tb,tw,rhop,sigyksi,anglerad):
+    '''
+    Vectorised form of vLV_solve_piek. The crossing of the shatter-onset diameter
+    tb/(v/1.436)^(1/3) and the low velocity limit is bracketed on [1.854, 50] km/s for
+    all configurations at once; where there is no crossing in the interval the end
+    with the smaller mismatch is used, as for the bounded minimisation it replaces
+    '''
+
+    tb,tw,rhop,sigyksi,anglerad = np.broadcast_arrays(*[np.asarray(x,dtype=float) for x in (tb,tw,rhop,sigyksi,anglerad)])
+
+    func = lambda x: (tb/(x/1.436)**(1/3))**2-\
+        (((tw*(sigyksi/40)**0.5+tb)/(0.6*(np.cos(anglerad))**(5/3)*rhop**0.5*np.abs(x)**(2/3)))**(18/19))**2
+    vLV = solve_bracketed(func,np.full(tb.shape,1.854),np.full(tb.shape,50.0)).root
     dpLV = tb/(vLV/1.436)**(1/3)
-    v1 = 2.60 if (tb/dpLV) >= 0.16 else 1.436*(tb/dpLV)**(-1/3)
+    v1 = np.where((tb/dpLV) >= 0.16, 2.60, 1.436*(tb/dpLV)**(-1/3))
 
     return v1
 
@@ -86,14 +180,12 @@ def vLV_solve_piek(tb,tw,rhop,sigyksi,anglerad):
 def dc_HV(tb,tw,S,sigyksi,rhop,rhob,anglerad,v,vHV):
     """
     Function to calculate critical projectile diameter in the hypervelocity regime
+    (single-point wrapper around dc_HV_vec)
     """
-    
-    func = lambda x: (x-F2star(S,x,tb,anglerad,rhop,rhob,sigyksi,vHV)**(-2/3)*\
-              (3.918*tw**(2/3)*S**(1/3)*(sigyksi/70)**(1/3))/(rhop**(1/3)*rhob**(1/9)*(v*np.cos(anglerad))**(2/3)))**2
-    dp0 = 3.918*tw**(2/3)*S**(1/3)*(sigyksi/70)**(1/3)/(rhop**(1/3)*rhob**(1/9)*(v*np.cos(anglerad))**(2/3))
-    dc = fmin_slsqp(func,dp0,disp=False)[0]
-    
-    return dc
+
+    result = dc_HV_vec(tb,tw,S,sigyksi,rhop,rhob,anglerad,v,vHV)
+
+    return float(result.root)
 
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
@@ -120,97 +212,49 @@ def F2star(S,dp,tb,anglerad,rhop,rhob,sigyksi,vHV):
 
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-## run the code to calculate critical diameter and generate ballistic limit curve
-if __name__ == "__main__":
+def dc_HV_vec(tb,tw,S,sigyksi,rhop,rhob,anglerad,v,vHV,sweep=False,active=None):
+    """
+    Vectorised form of dc_HV: solves dc = F2*(dc)^(-2/3)*dp0 for arrays of configurations
+    and velocities together with the bracketed root finder in solvers.py (relative
+    tolerance 1e-10 on dc). Returns a RootResult: the critical diameters, a boolean array
+    flagging the rows that converged and the iterations used; rows where no root exists
+    (e.g. the solution falls on the tb/dp,crit step at S/dp = 30) are returned at the
+    closest point and flagged False. With sweep=True the (broadcast) inputs must form an
+    (n, m) grid with the velocities along the last axis, and the 'active' points of the
+    grid are solved by continuation along the velocities (find_root_sweep)
+    """
 
-    from datetime import datetime
+    tb,tw,S,sigyksi,rhop,rhob,anglerad,v,vHV = np.broadcast_arrays(*[np.asarray(x,dtype=float) for x in (tb,tw,S,sigyksi,rhop,rhob,anglerad,v,vHV)])
 
-    ## Create the parser
-    parser = argparse.ArgumentParser(description='Process analysis inputs and flags.')
+    dp0 = 3.918*tw**(2/3)*S**(1/3)*(sigyksi/70)**(1/3)/(rhop**(1/3)*rhob**(1/9)*(v*np.cos(anglerad))**(2/3))
+    if sweep:
+        func = lambda x, index: x-F2star_vec(S[index],x,tb[index],anglerad[index],rhop[index],rhob[index],sigyksi[index],vHV[index])**(-2/3)*dp0[index]
+        return find_root_sweep(func,dp0,active=active)
 
-    ## Add the arguments
-    parser.add_argument('filename', type=str, help='The name and location of the file containing the analysis details, e.g., input_data/eval_example-foamSP.csv')
-    parser.add_argument('--data', action='store_true', help='Flag indicating that relevant test data should be included in the ballistic limit plot')
+    func = lambda x: x-F2star_vec(S,x,tb,anglerad,rhop,rhob,sigyksi,vHV)**(-2/3)*dp0
+    return find_root(func,dp0)
 
-    ## Parse the arguments
-    args = parser.parse_args()    
 
-    try:        
-        ## import the analysis details
-        root_dir = os.getcwd()
-        filename = args.filename
-        df_data = pd.read_csv(filename,skiprows=[1])
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def F2star_vec(S,dp,tb,anglerad,rhop,rhob,sigyksi,vHV):
+    """
+    Array form of F2star
+    """
 
-        ## convert units
-        df_data['wall_yield'] *= 0.145038  # units = ksi        
-            
-        ## generate ballistic limit curves
-        velocities = np.linspace(0.1,15,150)
-        df_plot = pd.DataFrame(np.repeat(df_data.values, len(velocities), axis=0), columns=df_data.columns)  # takes the first row of the imported dataframe and duplicates it to match the size of the 'velocities' vector
-        df_plot['velocity'] = velocities
-        df_plot['dc_BLE-JSCwhipple'] = df_plot.apply(JSCwhipple_performance,axis=1)
-        
-        ## Get the current date and time
-        now = datetime.now()
-        now_str = now.strftime("%Y%m%d_%H%M%S")
-        
-        ## save the plot data to file
-        # Check if the "results" directory exists, and create it if it doesn't
-        results_dir = os.path.join(root_dir, "results")
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir)    
-        df_results = df_plot[['velocity', 'dc_BLE-JSCwhipple']] 
-        df_results.to_csv(os.path.join(root_dir,"results",f"blc_data_{now_str}.csv"), index=False)     
-
-        ## save the configuration to file (for file name consistency)
-        df_data.to_csv(os.path.join(root_dir,"results",f"config_data_{now_str}.csv"), index=False)    
-
-        ## plot the results
-        plt.figure()
-        plt.plot(df_plot['velocity'],df_plot['dc_BLE-JSCwhipple'],label='BLE-JSCwhipple')
-        plt.xlabel('Velocity (km/s)')
-        plt.ylabel('Projectile diameter (cm)')
-
-        ## If the test data flag is set, plot the test data
-        if args.data:
-            # Load the test data
-            filename = 'database_whipple_pyBLOSSUM.csv'
-            df_test = pd.read_csv(os.path.join(root_dir,'data',filename),skiprows=[1])
-
-            # Filter the test data based on the selected values
-            lower_bound = 0.95
-            upper_bound = 1.05
-            mask = ((df_test['bumper_mat'].str[:9] == df_data['bumper_mat'][0][:9]) &  # allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials
-                    (df_test['bumper_thick'] >= lower_bound * df_data['bumper_thick'][0]) &
-                    (df_test['bumper_thick'] <= upper_bound * df_data['bumper_thick'][0]) &
-                    (df_test['standoff'] >= lower_bound * df_data['standoff'][0]) &
-                    (df_test['standoff'] <= upper_bound * df_data['standoff'][0]) &
-                    (df_test['wall_mat'].str[:9] == df_data['wall_mat'][0][:9]) &  # allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials
-                    (df_test['wall_thick'] >= lower_bound * df_data['wall_thick'][0]) &
-                    (df_test['wall_thick'] <= upper_bound * df_data['wall_thick'][0]) &
-                    (df_test['angle'] == df_data['angle'][0]))
-            df_filtered_test_data = df_test[mask]
-            df_NP = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 0]
-            df_P = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 1]
-            plt.scatter(df_NP['velocity'],df_NP['proj_diam'],edgecolors='black',facecolors='black',label='NP')
-            plt.scatter(df_P['velocity'],df_P['proj_diam'],edgecolors='black',facecolors='white',label='P')
-            df_filtered_test_data.to_csv(os.path.join(root_dir,"results",f"test_data_{now_str}.csv"), index=False) 
-
-        plt.ylim(0.0,2.0*df_plot['dc_BLE-JSCwhipple'][len(velocities)/2])
-        plt.legend()
-        # plt.show()
-            
-        ## Save the plot
-        plt.savefig(os.path.join(root_dir,'results',f'plot_{now_str}.png'))
-
-        ## Print completion statements
-        print(f"Ballistic limit plot saved to file: plot_{now_str}.png")
-        print(f"Ballistic limit curve data saved to file: blc_data_{now_str}.csv")
-        print(f"Configuration data saved to file: config_data_{now_str}.csv")
-        
-    except Exception as e:
-        print(f"An error occurred: {e}")
+    twtb0 = ((0.6*dp**(19/18)*(np.cos(anglerad))**(5/3)*rhop**0.5*vHV**(2/3)-0)/(sigyksi/40)**0.5)
+    twtbcrit = 0.16*dp**0.5*(rhop*rhob)**(1/6)*(np.pi*(dp/2)**3*rhop)**(1/3)*(vHV*np.cos(anglerad))*S**(-1/2)*(70/sigyksi)**(1/2)
+    rSD = twtb0/twtbcrit
+
+    tbondp_crit = np.where(S/dp >= 30, 0.20, 0.25)
+    F2star = np.where(tb/dp >= tbondp_crit, 1.0, rSD-2*(tb/dp)/tbondp_crit*(rSD-1)+((tb/dp)/tbondp_crit)**2*(rSD-1))
+
+    return F2star
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+## run the code to calculate critical diameter and generate ballistic limit curve
+## (equivalent to: python pyBLOSSUM.py run --ble JSCwhipple <input_file>)
+if __name__ == "__main__":
 
-    finally:
-        # Code to clean up resources here
-        plt.close('all')
+    from cli import main
+    sys.exit(main(ble='JSCwhipple'))
@@ -1,15 +1,5 @@
 import numpy as np
-import pandas as pd
-import os
 import sys
-from matplotlib import pyplot as plt
-import seaborn as sns
-import warnings
-from scipy import optimize
-
-plt.close('all')
-sns.set_theme()
-warnings.filterwarnings("ignore", category=RuntimeWarning)  ## supress runtime warnings
 
 '''
 References:
@@ -35,6 +25,25 @@ def fprime(x,row,vel,anglerad,msheff):
     '''
     return (29*np.pi/6*3*x**2*row['proj_density']*vel*np.cos(anglerad)*row['thickness']**-2+0.185)  
 
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def dc_enhanced(proj_density,thickness,vel,anglerad,msheff):
+    '''
+    Closed-form root of Eq. (8) from [2] for arrays of inputs. Eq. (8) is the depressed
+    cubic a*x^3 + b*x - msheff = 0 with a, b > 0, so it has exactly one real root, which
+    is found with Cardano's formula written in a cancellation-free form
+    '''
+
+    a = 29*np.pi/6*proj_density*vel*np.cos(anglerad)*thickness**-2
+    b = 0.185*proj_density
+
+    ## reduce to x^3 + p*x + q = 0 (p > 0, so the discriminant is always positive)
+    p = b/a
+    q = -msheff/a
+    u = np.cbrt(-q/2+np.sqrt((q/2)**2+(p/3)**3))
+
+    ## x = u - p/(3u), rearranged as -q/(u^2 - u*w + w^2) with w = -p/(3u) to avoid subtraction
+    return -q/(u**2+p/3+(p/(3*u))**2)
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 def mli_performance(row):
     '''
@@ -48,6 +57,8 @@ def mli_performance(row):
       polymide foam, UHMWPE (Spectra) absorber layers, and a thickened Mylar rear
       cover (see [2] for details)
     '''
+    ## scipy is only needed by the Newton solves of this row function, not by the array kernel
+    from scipy import optimize
 
     ## convert the angle to radians
     anglerad = np.deg2rad(row['angle'])
@@ -96,61 +107,59 @@ def mli_performance(row):
 
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-## run the code to calculate critical diameter and generate ballistic limit curve
-if __name__ == "__main__":
+@np.errstate(divide='ignore', invalid='ignore', over='ignore')
+def mli_performance_vec(df):
+    '''
+    Array form of mli_performance. Takes a DataFrame (or any mapping of column name to
+    array) and returns the critical diameter of every row as a numpy array. The Enhanced
+    hypervelocity branch is solved for all rows at once with dc_enhanced
+    '''
 
-    from datetime import datetime
+    ## extract the inputs as arrays
+    mli_type = np.asarray(df['type'])
+    proj_density = np.asarray(df['proj_density'],dtype=float)
+    wall_thick = np.asarray(df['wall_thick'],dtype=float)
+    wall_AD = np.asarray(df['wall_AD'],dtype=float)
+    bumper_AD = np.asarray(df['bumper_AD'],dtype=float)
+    MLI_AD = np.asarray(df['MLI_AD'],dtype=float)
+    thickness = np.asarray(df['thickness'],dtype=float)
+    velocity = np.asarray(df['velocity'],dtype=float)
 
-    try:        
-        ## import the analysis details
-        root_dir = os.getcwd()
-        filename = sys.argv[1]
-        df_data = pd.read_csv(filename,skiprows=[1])
+    ## convert the angle to radians
+    anglerad = np.deg2rad(np.asarray(df['angle'],dtype=float))
+    cosang = np.cos(anglerad)
+
+    ## calculate the configuration-specific constants (unknown types give NaN)
+    is_baseline = mli_type == 'Baseline'
+    is_toughened = mli_type == 'Toughened'
+    is_enhanced = mli_type == 'Enhanced'
+    KL = np.select([is_baseline | is_toughened, is_enhanced], [1.7, 2.7], np.nan)
+    QL = np.where(is_enhanced, 0.5*wall_AD, wall_thick)
+    KH = np.select([is_baseline, is_toughened], [2.9, 1.34], 0.0)
+    vLV = np.where(is_enhanced, 2.4/cosang**0.5, 2.5/cosang)
+    vHV = np.select([is_baseline, is_toughened, is_enhanced],
+                    [6/cosang**0.5, 6.2/cosang**0.25, 6.4/cosang**0.25], np.nan)
+
+    ## hypervelocity limit, evaluated at the impact velocity and at vHV (shatter anchor)
+    msheff = bumper_AD+wall_AD+0.25*MLI_AD
+    def dc_high(vel):
+        dc_power = KH*wall_thick**(2/3)/(proj_density**(1/3)*vel**(2/3)*cosang**(2/3))
+        return np.where(is_enhanced, dc_enhanced(proj_density,thickness,vel,anglerad,msheff), dc_power)
 
-        ## convert units
-        df_data['wall_yield'] *= 0.145038  # units = ksi        
-        
-        ## generate ballistic limit curves
-        velocities = np.linspace(0.1,15,150)
-        df_plot = pd.DataFrame(np.repeat(df_data.values, len(velocities), axis=0), columns=df_data.columns)  # takes the first row of the imported dataframe and duplicates it to match the size of the 'velocities' vector
-        df_plot['velocity'] = velocities
-        df_plot['dc_BLE'] = df_plot.apply(mli_performance,axis=1)
-        
-        ## Get the current date and time
-        now = datetime.now()
-        now_str = now.strftime("%Y%m%d_%H%M%S")
-        
-        ## save the plot data to file
-        # Check if the "results" directory exists, and create it if it doesn't
-        results_dir = os.path.join(root_dir, "results")
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir)    
-        df_results = df_plot[['velocity', 'dc_BLE']] 
-        df_results.to_csv(os.path.join(root_dir,"results",f"blc_data_{now_str}.csv"), index=False)     
-
-        ## save the configuration to file (for file name consistency)
-        df_data.to_csv(os.path.join(root_dir,"results",f"config_data_{now_str}.csv"), index=False)    
-        
-        ## plot the results
-        plt.figure()
-        plt.plot(df_plot['velocity'],df_plot['dc_BLE'],label='BLE')
-        plt.xlabel('Velocity (km/s)')
-        plt.ylabel('Projectile diameter (cm)')
-        plt.ylim(0.0,2.0*df_plot['dc_BLE'][len(velocities)/2])
-        plt.legend()
-        # plt.show()
-        
-        ## Save the plot
-        plt.savefig(os.path.join(root_dir,'results',f'plot_{now_str}.png'))
+    ## Ballistic limit calculation
+    dcLV = KL*(QL+0.37*bumper_AD)/(cosang**(4/3)*proj_density**0.5*vLV**(2/3))
+    dcHV = dc_high(vHV)
+    dc_low = KL*(QL+0.37*bumper_AD)/(cosang**(4/3)*proj_density**0.5*velocity**(2/3))
+    dc_shatter = dcLV+(dcHV-dcLV)/(vHV-vLV)*(velocity-vLV)
+    dc = np.where(velocity <= vLV, dc_low, np.where(velocity >= vHV, dc_high(velocity), dc_shatter))
+
+    return dc
 
-        ## Print completion statements
-        print(f"Ballistic limit plot saved to file: plot_{now_str}.png")
-        print(f"Ballistic limit curve data saved to file: blc_data_{now_str}.csv")
-        print(f"Configuration data saved to file: config_data_{now_str}.csv")             
 
-    except Exception as e:
-        print(f"An error occurred: {e}")
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+## run the code to calculate critical diameter and generate ballistic limit curve
+## (equivalent to: python pyBLOSSUM.py run --ble MLI <input_file>)
+if __name__ == "__main__":
 
-    finally:
-        # Code to clean up resources here
-        plt.close('all')
\ No newline at end of file
+    from cli import main
+    sys.exit(main(ble='MLI'))
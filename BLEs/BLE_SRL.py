@@ -1,14 +1,5 @@
 import numpy as np
-import pandas as pd
-import os
-import argparse
-from matplotlib import pyplot as plt
-import seaborn as sns
-import warnings
-
-plt.close('all')
-sns.set_theme()
-warnings.filterwarnings("ignore", category=RuntimeWarning)  ## supress runtime warnings
+import sys
 
 '''
 References:
@@ -150,100 +141,159 @@ def SRL_triple_performance(row):
 
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-## run the code to calculate critical diameter and generate ballistic limit curve
-if __name__ == "__main__":
+def SRL_performance(row):
+    '''
+    Selects the double- or triple-wall equation from the configuration 'type'
+    '''
+    if row['type'] == 'double':
+        return SRL_double_performance(row)
+    elif row['type'] == 'triple':
+        return SRL_triple_performance(row)
+    return np.nan
 
-    from datetime import datetime
 
-    ## Create the parser
-    parser = argparse.ArgumentParser(description='Process analysis inputs and flags.')
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+@np.errstate(divide='ignore', invalid='ignore', over='ignore')
+def SRL_double_performance_vec(df):
+    '''
+    Array form of SRL_double_performance. Takes a DataFrame (or any mapping of column
+    name to array) and returns the critical diameter of every row as a numpy array. The
+    bumper material branches (CFRP, Other, metallic) are resolved with masks
+    '''
 
-    ## Add the arguments
-    parser.add_argument('filename', type=str, help='The name and location of the file containing the analysis details, e.g., input_data/eval_example-foamSP.csv')
-    parser.add_argument('--data', action='store_true', help='Flag indicating that relevant test data should be included in the ballistic limit plot')
+    ## define the equation constants
+    K_MLI = 3
+    K3D = 0.4
 
-    ## Parse the arguments
-    args = parser.parse_args()        
+    ## define the reference material properties
+    sigyksi_ref = 59.5
+    rho_ref = 2.78
 
-    try:        
-        ## import the analysis details
-        root_dir = os.getcwd()
-        filename = args.filename
-        df_data = pd.read_csv(filename,skiprows=[1])
+    ## extract the inputs as arrays
+    bumper_mat = np.asarray(df['bumper_mat'])
+    proj_density = np.asarray(df['proj_density'],dtype=float)
+    bumper_thick = np.asarray(df['bumper_thick'],dtype=float)
+    bumper_density = np.asarray(df['bumper_density'],dtype=float)
+    AD_MLI = np.asarray(df['AD_MLI'],dtype=float)
+    standoff = np.asarray(df['standoff'],dtype=float)
+    wall_thick = np.asarray(df['wall_thick'],dtype=float)
+    wall_density = np.asarray(df['wall_density'],dtype=float)
+    wall_yield = np.asarray(df['wall_yield'],dtype=float)
+    velocity = np.asarray(df['velocity'],dtype=float)
 
-        ## convert units
-        df_data['wall_yield'] *= 0.145038  # units = ksi        
-        
-        ## generate ballistic limit curves
-        velocities = np.linspace(0.1,15,150)
-        df_plot = pd.DataFrame(np.repeat(df_data.values, len(velocities), axis=0), columns=df_data.columns)  # takes the first row of the imported dataframe and duplicates it to match the size of the 'velocities' vector
-        df_plot['velocity'] = velocities
-        if df_plot.iloc[0]['type'] == 'double':
-            df_plot['dc_BLE'] = df_plot.apply(SRL_double_performance,axis=1)
-        elif df_plot.iloc[0]['type'] == 'triple':
-            df_plot['dc_BLE'] = df_plot.apply(SRL_triple_performance,axis=1)
-        
-        ## Get the current date and time
-        now = datetime.now()
-        now_str = now.strftime("%Y%m%d_%H%M%S")
-        
-        ## save the plot data to file
-        # Check if the "results" directory exists, and create it if it doesn't
-        results_dir = os.path.join(root_dir, "results")
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir)  
-        df_results = df_plot[['velocity', 'dc_BLE']] 
-        df_results.to_csv(os.path.join(root_dir,"results",f"blc_data_{now_str}.csv"), index=False)     
-
-        ## save the configuration to file (for file name consistency)
-        df_data.to_csv(os.path.join(root_dir,"results",f"config_data_{now_str}.csv"), index=False)    
-        
-        ## plot the results
-        plt.figure()
-        plt.plot(df_plot['velocity'],df_plot['dc_BLE'],label='BLE-SRL')
-        plt.xlabel('Velocity (km/s)')
-        plt.ylabel('Projectile diameter (cm)')
-
-        ## If the test data flag is set, plot the test data
-        if args.data and df_data.iloc[0]['type'] == 'double':
-            # Load the test data
-            filename = 'database_HCSP_pyBLOSSUM.csv'
-            df_test = pd.read_csv(os.path.join(root_dir,'data',filename),skiprows=[1])
-
-            # Filter the test data based on the selected values
-            lower_bound = 0.95
-            upper_bound = 1.05
-            mask = ((df_test['bumper_mat'].str[:9] == df_data['bumper_mat'][0][:9]) &  # allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials
-                    (df_test['bumper_thick'] >= lower_bound * df_data['bumper_thick'][0]) &
-                    (df_test['bumper_thick'] <= upper_bound * df_data['bumper_thick'][0]) &
-                    (df_test['standoff'] >= lower_bound * df_data['standoff'][0]) &
-                    (df_test['standoff'] <= upper_bound * df_data['standoff'][0]) &
-                    (df_test['wall_mat'].str[:9] == df_data['wall_mat'][0][:9]) &  # allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials
-                    (df_test['wall_thick'] >= lower_bound * df_data['wall_thick'][0]) &
-                    (df_test['wall_thick'] <= upper_bound * df_data['wall_thick'][0]) &
-                    (df_test['angle'] == df_data['angle'][0]))
-            df_filtered_test_data = df_test[mask]
-            df_NP = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 0]
-            df_P = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 1]
-            plt.scatter(df_NP['velocity'],df_NP['proj_diam'],edgecolors='black',facecolors='black',label='NP')
-            plt.scatter(df_P['velocity'],df_P['proj_diam'],edgecolors='black',facecolors='white',label='P')
-            df_filtered_test_data.to_csv(os.path.join(root_dir,"results",f"test_data_{now_str}.csv"), index=False) 
-
-        plt.ylim(0.0,2.0*df_plot['dc_BLE'][len(velocities)/2])
-        plt.legend()
-        # plt.show()
-        
-        ## Save the plot
-        plt.savefig(os.path.join(root_dir,'results',f'plot_{now_str}.png'))
+    ## handle the impact obliquity
+    angledeg = np.asarray(df['angle'],dtype=float)
+    cosang = np.cos(np.deg2rad(angledeg))
+
+    ## define the material-dependent constants (CFRP and Other bumpers use the AA2024-T81 reference properties)
+    is_cfrp = bumper_mat == "CFRP"
+    is_reference = is_cfrp | (bumper_mat == "Other")
+    sigyksi = np.where(is_reference, sigyksi_ref, wall_yield)
+    rhob = np.where(is_reference, rho_ref, bumper_density)
+    tb = np.where(is_reference, bumper_thick*bumper_density/rho_ref, bumper_thick)
+    tw = np.where(is_reference, wall_thick*wall_density/rho_ref, wall_thick)
+    tb_tot = tb+K_MLI*AD_MLI/rho_ref
+    vLV = np.where(is_cfrp, 4.2, 3)/cosang
+    vHV = np.where(is_cfrp, 8.4, 7)/cosang
+    delta = np.where(is_cfrp | (angledeg <= 45) | (angledeg >= 65), 4/3, 5/4)
+    K3S = np.where(is_cfrp, 1.1, 1.4)
+
+    # Ballistic limit calculation
+    dc_low = lambda vel: ((tw/K3S*(sigyksi/40)**0.5+tb_tot)/(0.6*cosang**delta*proj_density**0.5*vel**(2/3)))**(18/19)
+    dc_high = lambda vel: (1.155*(standoff**(1/3)*tw**(2/3))*(sigyksi/70)**(1/3))/(K3D**(2/3)*proj_density**(1/3)*rhob**(1/9)*vel**(2/3)*cosang**delta)
+    dcLV = dc_low(vLV)
+    dcHV = dc_high(vHV)
+    dc_shatter = dcLV+(dcHV-dcLV)/(vHV-vLV)*(velocity-vLV)
+    dc = np.where(velocity <= vLV, dc_low(velocity), np.where(velocity >= vHV, dc_high(velocity), dc_shatter))
+
+    return dc
 
-        ## Print completion statements
-        print(f"Ballistic limit plot saved to file: plot_{now_str}.png")
-        print(f"Ballistic limit curve data saved to file: blc_data_{now_str}.csv")
-        print(f"Configuration data saved to file: config_data_{now_str}.csv")         
 
-    except Exception as e:
-        print(f"An error occurred: {e}")
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+@np.errstate(divide='ignore', invalid='ignore', over='ignore')
+def SRL_triple_performance_vec(df):
+    '''
+    Array form of SRL_triple_performance. Takes a DataFrame (or any mapping of column
+    name to array) and returns the critical diameter of every row as a numpy array. The
+    outer/inner bumper materials and the 45-65 deg obliquity band are resolved with masks
+    '''
+
+    ## define the equation constants
+    K_MLI = 3
+    K3D = 0.4
+
+    ## define the reference material properties (AA2024-T81)
+    rho_ref = 2.78
+
+    ## extract the inputs as arrays
+    outerBumper_mat = np.asarray(df['outerBumper_mat'])
+    innerBumper_mat = np.asarray(df['innerBumper_mat'])
+    proj_density = np.asarray(df['proj_density'],dtype=float)
+    outerBumper_thick = np.asarray(df['outerBumper_thick'],dtype=float)
+    outerBumper_density = np.asarray(df['outerBumper_density'],dtype=float)
+    standoff1 = np.asarray(df['standoff1'],dtype=float)
+    innerBumper_thick = np.asarray(df['innerBumper_thick'],dtype=float)
+    innerBumper_density = np.asarray(df['innerBumper_density'],dtype=float)
+    standoff2 = np.asarray(df['standoff2'],dtype=float)
+    wall_thick = np.asarray(df['wall_thick'],dtype=float)
+    wall_yield = np.asarray(df['wall_yield'],dtype=float)
+    AD_MLI = np.asarray(df['AD_MLI'],dtype=float)
+    velocity = np.asarray(df['velocity'],dtype=float)
+
+    ## handle the impact obliquity
+    angledeg = np.minimum(np.asarray(df['angle'],dtype=float), 65)
+    cosang = np.cos(np.deg2rad(angledeg))
+
+    ## define the material-dependent constants for the outer bumper
+    outer_cfrp = outerBumper_mat == "CFRP"
+    band = (angledeg <= 45) | (angledeg >= 65)
+    tob_tot = np.where(outer_cfrp, outerBumper_thick*outerBumper_density/rho_ref, outerBumper_thick)+K_MLI*AD_MLI/rho_ref
+    vLV = np.where(outer_cfrp, 4.2, 3)/cosang
+    vHV = np.where(outer_cfrp, 8.4, 7)/cosang
+    K3S = np.where(outer_cfrp, 1.1, 1.4)
+    KS2 = np.where(outer_cfrp, 1, 0.1)
+    KTW = np.where(outer_cfrp, 1, 1.5)
+    beta = np.where(outer_cfrp, 1/3, 2/3)
+    delta = np.where(outer_cfrp | band, 4/3, 5/4)
+    epsilon = np.select([outer_cfrp, band], [0, 8/3], 10/4)
+    gamma = np.where(outer_cfrp, 2/3, 1/3)
+
+    ## define the material-dependent constants for the inner bumper
+    inner_cfrp = innerBumper_mat == "CFRP"
+    rhob = np.where(inner_cfrp, rho_ref, innerBumper_density)
+    tb = np.where(inner_cfrp, innerBumper_thick*innerBumper_density/rho_ref, innerBumper_thick)
+
+    ## Ballistic limit calculation
+    dc_low = lambda vel: (((wall_thick**0.5+tb)/K3S*(wall_yield/40)**0.5+tob_tot)/(0.6*cosang**delta*proj_density**0.5*vel**(2/3)))**(18/19)
+    dc_high = lambda vel: (1.155*(standoff1**(1/3)*(tb+KTW*wall_thick)**(2/3)+KS2*standoff2**beta*wall_thick**gamma*cosang**(-epsilon))*(wall_yield/70)**(1/3))/(K3D**(2/3)*proj_density**(1/3)*rhob**(1/9)*vel**(2/3)*cosang**delta)
+    dcLV = dc_low(vLV)
+    dcHV = dc_high(vHV)
+    dc_shatter = dcLV+(dcHV-dcLV)/(vHV-vLV)*(velocity-vLV)
+    dc = np.where(velocity <= vLV, dc_low(velocity), np.where(velocity >= vHV, dc_high(velocity), dc_shatter))
+
+    return dc
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+@np.errstate(divide='ignore', invalid='ignore', over='ignore')
+def SRL_performance_vec(df):
+    '''
+    Array form of SRL_performance. Each equation is only evaluated if the frame contains
+    configurations of its type, so a file of a single type needs only that type's columns
+    '''
+    config_type = np.asarray(df['type'])
+    dc = np.full(config_type.shape, np.nan)
+    for name, performance in (('double', SRL_double_performance_vec), ('triple', SRL_triple_performance_vec)):
+        is_type = config_type == name
+        if is_type.any():
+            dc = np.where(is_type, performance(df), dc)
+    return dc
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+## run the code to calculate critical diameter and generate ballistic limit curve
+## (equivalent to: python pyBLOSSUM.py run --ble SRL <input_file>)
+if __name__ == "__main__":
 
-    finally:
-        # Code to clean up resources here
-        plt.close('all')
\ No newline at end of file
+    from cli import main
+    sys.exit(main(ble='SRL'))
@@ -1,14 +1,5 @@
 import numpy as np
-import pandas as pd
-import os
-import argparse
-from matplotlib import pyplot as plt
-import seaborn as sns
-import warnings
-
-plt.close('all')
-sns.set_theme()
-warnings.filterwarnings("ignore", category=RuntimeWarning)  ## supress runtime warnings
+import sys
 
 '''
 References:
@@ -70,98 +61,87 @@ def foamSP_performance(row):
     return dc
 
 
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def foam_input(df, col):
+    '''
+    Function to read an optional foam core input as a float array, with missing values
+    (absent column, empty, NaN or 'N/A' strings as in the sandwich panel inputs) returned as 0
+    '''
+    if col not in df:
+        return np.zeros(1)
+    values = np.asarray(df[col])
+    if values.dtype.kind not in 'biuf':
+        ## strings (or objects): blanks and the missing-value markers become 0
+        strings = np.char.strip(values.astype(str))
+        missing = np.isin(np.char.upper(strings), ['', 'N/A', 'NAN', 'NONE'])
+        values = np.where(missing, '0', strings)
+    return np.nan_to_num(values.astype(float), nan=0.0)
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+@np.errstate(divide='ignore', invalid='ignore', over='ignore')
+def foamSP_performance_vec(df):
+    '''
+    Array form of foamSP_performance. Takes a DataFrame (or any mapping of column name
+    to array) and returns the critical diameter of every row as a numpy array. The foam
+    properties are resolved with the same precedence (SP_mass, SP_AD, foam_density,
+    foam_AD), skipping missing inputs; rows with no foam input return NaN
+    '''
+
+    ## define the constants
+    C1 = 1.83
+    C2 = 1.1
+    C3 = 0.89
+    K_MLI = 3
+    rho_ref = 2.78
+
+    ## extract the inputs as arrays
+    proj_density = np.asarray(df['proj_density'],dtype=float)
+    bumper_thick = np.asarray(df['bumper_thick'],dtype=float)
+    bumper_density = np.asarray(df['bumper_density'],dtype=float)
+    AD_MLI = np.asarray(df['AD_MLI'],dtype=float)
+    standoff = np.asarray(df['standoff'],dtype=float)
+    wall_thick = np.asarray(df['wall_thick'],dtype=float)
+    wall_density = np.asarray(df['wall_density'],dtype=float)
+    wall_yield = np.asarray(df['wall_yield'],dtype=float)
+    velocity = np.asarray(df['velocity'],dtype=float)
+    SP_mass = foam_input(df, 'SP_mass')
+    SP_AD = foam_input(df, 'SP_AD')
+    foam_density_in = foam_input(df, 'foam_density')
+    foam_AD_in = foam_input(df, 'foam_AD')
+
+    ## convert the angle to radians
+    anglerad = np.deg2rad(np.asarray(df['angle'],dtype=float))
+    cosang = np.cos(anglerad)
+
+    ## define the velocity regime transitions
+    vLV = 2.25/cosang**(1/3)
+    vHV = 4.0/cosang**(1/3)
+
+    ## calculate the missing information from the first non-zero of SP mass, SP AD, foam density and foam AD
+    AD_facesheets = bumper_thick*bumper_density+wall_thick*wall_density
+    conditions = [SP_mass != 0, SP_AD != 0, foam_density_in != 0, foam_AD_in != 0]
+    foam_AD = np.select(conditions, [SP_mass/(standoff+bumper_thick+wall_thick)-AD_facesheets, SP_AD-AD_facesheets, foam_density_in*standoff, foam_AD_in], default=np.nan)  # units = g/cm2
+    foam_density = np.select(conditions, [foam_AD/standoff, foam_AD/standoff, foam_density_in, foam_AD_in/standoff], default=np.nan)  # units = g/cm3
+
+    ## account for the presence of MLI by increasing the effective thickness of the front facesheet
+    tb_tot = np.where(AD_MLI > 0, bumper_thick+K_MLI*AD_MLI/rho_ref, bumper_thick)
+
+    # Ballistic limit calculation
+    dc_low = lambda vel: C1*(tb_tot+wall_thick*(wall_yield/40)**(1/2)+standoff**C2*(foam_density/wall_density))/(proj_density**(1/2)*vel**(2/3)*cosang**(4/5))**(18/19)
+    dc_high = lambda vel: 2.152*(wall_thick+0.5*foam_AD/wall_density)**(2/3)*C3*standoff**(9/20)*(wall_yield/70)**(1/3)/(proj_density**(1/3)*bumper_density**(1/9)*vel**(2/5)*cosang**(4/5))
+    dcLV = dc_low(vLV)
+    dcHV = dc_high(vHV)
+    dc_shatter = dcLV+(dcHV-dcLV)/(vHV-vLV)*(velocity-vLV)
+    dc = np.where(velocity <= vLV, dc_low(velocity), np.where(velocity >= vHV, dc_high(velocity), dc_shatter))
+
+    return dc
+
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 ## run the code to calculate critical diameter and generate ballistic limit curve
+## (equivalent to: python pyBLOSSUM.py run --ble foamSP <input_file>)
 if __name__ == "__main__":
-        
-    from datetime import datetime
-
-    ## Create the parser
-    parser = argparse.ArgumentParser(description='Process analysis inputs and flags.')
-
-    ## Add the arguments
-    parser.add_argument('filename', type=str, help='The name and location of the file containing the analysis details, e.g., input_data/eval_example-foamSP.csv')
-    parser.add_argument('--data', action='store_true', help='Flag indicating that relevant test data should be included in the ballistic limit plot')
-
-    ## Parse the arguments
-    args = parser.parse_args()          
-
-    try:        
-        ## import the analysis details
-        root_dir = os.getcwd()
-        filename = args.filename
-        df_data = pd.read_csv(filename,skiprows=[1]) 
-
-        ## convert units
-        df_data['wall_yield'] *= 0.145038  # units = ksi        
-        
-        ## generate ballistic limit curves
-        velocities = np.linspace(0.1,15,150)
-        df_plot = pd.DataFrame(np.repeat(df_data.values, len(velocities), axis=0), columns=df_data.columns)  # takes the first row of the imported dataframe and duplicates it to match the size of the 'velocities' vector
-        df_plot['velocity'] = velocities
-        df_plot['dc_BLE'] = df_plot.apply(foamSP_performance,axis=1)
-        
-        ## Get the current date and time
-        now = datetime.now()
-        now_str = now.strftime("%Y%m%d_%H%M%S")
-        
-        ## save the plot data to file
-        # Check if the "results" directory exists, and create it if it doesn't
-        results_dir = os.path.join(root_dir, "results")
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir)    
-        df_results = df_plot[['velocity', 'dc_BLE']] 
-        df_results.to_csv(os.path.join(root_dir,"results",f"blc_data_{now_str}.csv"), index=False)     
-
-        ## save the configuration to file (for file name consistency)
-        df_data.to_csv(os.path.join(root_dir,"results",f"config_data_{now_str}.csv"), index=False)    
-
-        ## plot the results
-        plt.figure()
-        plt.plot(df_plot['velocity'],df_plot['dc_BLE'],label='BLE')
-        plt.xlabel('Velocity (km/s)')
-        plt.ylabel('Projectile diameter (cm)')
-
-        ## If the test data flag is set, plot the test data
-        if args.data:
-            # Load the test data
-            filename = 'database_foamSP_pyBLOSSUM.csv'
-            df_test = pd.read_csv(os.path.join(root_dir,'data',filename),skiprows=[1])
-
-            # Filter the test data based on the selected values
-            lower_bound = 0.95
-            upper_bound = 1.05
-            mask = ((df_test['bumper_mat'].str[:9] == df_data['bumper_mat'][0][:9]) &  # allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials
-                    (df_test['bumper_thick'] >= lower_bound * df_data['bumper_thick'][0]) &
-                    (df_test['bumper_thick'] <= upper_bound * df_data['bumper_thick'][0]) &
-                    (df_test['standoff'] >= lower_bound * df_data['standoff'][0]) &
-                    (df_test['standoff'] <= upper_bound * df_data['standoff'][0]) &
-                    (df_test['wall_mat'].str[:9] == df_data['wall_mat'][0][:9]) &  # allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials
-                    (df_test['wall_thick'] >= lower_bound * df_data['wall_thick'][0]) &
-                    (df_test['wall_thick'] <= upper_bound * df_data['wall_thick'][0]) &
-                    (df_test['angle'] == df_data['angle'][0]))
-            df_filtered_test_data = df_test[mask]
-            df_NP = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 0]
-            df_P = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 1]
-            plt.scatter(df_NP['velocity'],df_NP['proj_diam'],edgecolors='black',facecolors='black',label='NP')
-            plt.scatter(df_P['velocity'],df_P['proj_diam'],edgecolors='black',facecolors='white',label='P')
-            df_filtered_test_data.to_csv(os.path.join(root_dir,"results",f"test_data_{now_str}.csv"), index=False) 
-
-        plt.ylim(0.0,2.0*df_plot['dc_BLE'][len(velocities)/2])
-        plt.legend()
-        # plt.show()
-        
-        ## Save the plot
-        plt.savefig(os.path.join(root_dir,'results',f'plot_{now_str}.png'))
-
-        ## Print completion statements
-        print(f"Ballistic limit plot saved to file: plot_{now_str}.png")
-        print(f"Ballistic limit curve data saved to file: blc_data_{now_str}.csv")
-        print(f"Configuration data saved to file: config_data_{now_str}.csv")        
-
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-    finally:
-        # Code to clean up resources here
-        plt.close('all')
\ No newline at end of file
+
+    from cli import main
+    sys.exit(main(ble='foamSP'))
@@ -1,14 +1,5 @@
 import numpy as np
-import pandas as pd
-import os
 import sys
-from matplotlib import pyplot as plt
-import seaborn as sns
-import warnings
-
-plt.close('all')
-sns.set_theme()
-warnings.filterwarnings("ignore", category=RuntimeWarning)  ## supress runtime warnings
 
 '''
 References:
@@ -42,62 +33,48 @@ def meshDB_performance(row):
     return dc
 
 
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+@np.errstate(divide='ignore', invalid='ignore', over='ignore')
+def meshDB_performance_vec(df):
+    '''
+    Array form of meshDB_performance. Takes a DataFrame (or any mapping of column name
+    to array) and returns the critical diameter of every row as a numpy array
+    '''
+
+    ## extract the inputs as arrays
+    proj_density = np.asarray(df['proj_density'],dtype=float)
+    wall_thick = np.asarray(df['wall_thick'],dtype=float)
+    wall_density = np.asarray(df['wall_density'],dtype=float)
+    wall_yield = np.asarray(df['wall_yield'],dtype=float)
+    standoff = np.asarray(df['standoff'],dtype=float)
+    velocity = np.asarray(df['velocity'],dtype=float)
+
+    ## convert the angle to radians
+    anglerad = np.deg2rad(np.asarray(df['angle'],dtype=float))
+    cosang = np.cos(anglerad)
+
+    ## define the velocity regime transitions
+    vLV = 2.8/cosang**0.5
+    vHV = 6.4/cosang**(1/3)
+
+    ## calculate the total bumper AD
+    bumper_AD = np.asarray(df['mesh_AD'],dtype=float) + np.asarray(df['bumper_thick'],dtype=float)*np.asarray(df['bumper_density'],dtype=float) + np.asarray(df['kevlar_AD'],dtype=float)  # units = g/cm2
+
+    ## Ballistic limit calculation
+    dc_low = lambda vel: 2.2*(wall_thick*(wall_yield/40)**0.5+0.37*bumper_AD)/(cosang**(5/3)*proj_density**0.5*vel**(2/3))
+    dc_high = lambda vel: 0.6*(wall_thick*wall_density)**(1/3)*standoff**(1/2)*(wall_yield/40)**(1/6)/(proj_density**(1/3)*vel**(1/3)*cosang**(1/3))
+    dcLV = dc_low(vLV)
+    dcHV = dc_high(vHV)
+    dc_shatter = dcLV+(dcHV-dcLV)/(vHV-vLV)*(velocity-vLV)
+    dc = np.where(velocity <= vLV, dc_low(velocity), np.where(velocity >= vHV, dc_high(velocity), dc_shatter))
+
+    return dc
+
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 ## run the code to calculate critical diameter and generate ballistic limit curve
+## (equivalent to: python pyBLOSSUM.py run --ble meshDB <input_file>)
 if __name__ == "__main__":
 
-    from datetime import datetime
-
-    try:        
-        ## import the analysis details
-        root_dir = os.getcwd()
-        filename = sys.argv[1]
-        df_data = pd.read_csv(filename,skiprows=[1])
-        
-        ## convert units
-        df_data['wall_yield'] *= 0.145038  # units = ksi
-                
-        ## generate ballistic limit curves
-        velocities = np.linspace(0.1,15,150)
-        df_plot = pd.DataFrame(np.repeat(df_data.values, len(velocities), axis=0), columns=df_data.columns)  # takes the first row of the imported dataframe and duplicates it to match the size of the 'velocities' vector
-        df_plot['velocity'] = velocities
-        df_plot['dc_BLE'] = df_plot.apply(meshDB_performance,axis=1)
-        
-        ## Get the current date and time
-        now = datetime.now()
-        now_str = now.strftime("%Y%m%d_%H%M%S")
-        
-        ## save the plot data to file
-        # Check if the "results" directory exists, and create it if it doesn't
-        results_dir = os.path.join(root_dir, "results")
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir)    
-        df_results = df_plot[['velocity', 'dc_BLE']] 
-        df_results.to_csv(os.path.join(root_dir,"results",f"blc_data_{now_str}.csv"), index=False)     
-
-        ## save the configuration to file (for file name consistency)
-        df_data.to_csv(os.path.join(root_dir,"results",f"config_data_{now_str}.csv"), index=False)    
-        
-        ## plot the results
-        plt.figure()
-        plt.plot(df_plot['velocity'],df_plot['dc_BLE'],label='BLE')
-        plt.xlabel('Velocity (km/s)')
-        plt.ylabel('Projectile diameter (cm)')
-        plt.ylim(0.0,2.0*df_plot['dc_BLE'][len(velocities)/2])
-        plt.legend()
-        # plt.show()
-        
-        ## Save the plot
-        plt.savefig(os.path.join(root_dir,'results',f'plot_{now_str}.png'))
-
-        ## Print completion statements
-        print(f"Ballistic limit plot saved to file: plot_{now_str}.png")
-        print(f"Ballistic limit curve data saved to file: blc_data_{now_str}.csv")
-        print(f"Configuration data saved to file: config_data_{now_str}.csv")              
-
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-    finally:
-        # Code to clean up resources here
-        plt.close('all')
\ No newline at end of file
+    from cli import main
+    sys.exit(main(ble='meshDB'))
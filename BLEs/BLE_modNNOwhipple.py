@@ -1,14 +1,5 @@
 import numpy as np
-import pandas as pd
-import os
-from matplotlib import pyplot as plt
-import seaborn as sns
-import warnings
-import argparse
-
-plt.close('all')
-sns.set_theme()
-warnings.filterwarnings("ignore", category=RuntimeWarning)  ## supress runtime warnings
+import sys
 
 '''
 Reference: E Christiansen, J Kerr. 2001. Ballistic limit equations for spacecraft shielding, 
@@ -62,98 +53,62 @@ def modNNO_performance(row):
     return dc  
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+@np.errstate(divide='ignore', invalid='ignore', over='ignore')
+def modNNO_performance_vec(df):
+    '''
+    Array form of modNNO_performance. Takes a DataFrame (or any mapping of column name to
+    array) and returns the critical diameter of every row as a numpy array
+    '''
+
+    ## extract the inputs as arrays
+    proj_density = np.asarray(df['proj_density'],dtype=float)
+    bumper_thick = np.asarray(df['bumper_thick'],dtype=float)
+    bumper_density = np.asarray(df['bumper_density'],dtype=float)
+    standoff = np.asarray(df['standoff'],dtype=float)
+    wall_thick = np.asarray(df['wall_thick'],dtype=float)
+    wall_density = np.asarray(df['wall_density'],dtype=float)
+    wall_yield = np.asarray(df['wall_yield'],dtype=float)
+    AD_MLI = np.asarray(df['AD_MLI'],dtype=float)
+    S_MLI = np.asarray(df['S_MLI'],dtype=float)
+    velocity = np.asarray(df['velocity'],dtype=float)
+
+    ## define the obliquity limit
+    anglerad = np.deg2rad(np.minimum(np.asarray(df['angle'],dtype=float),65))
+    cosang = np.cos(anglerad)
+
+    ## account for the presence of MLI (internal if S_MLI > 0, otherwise external)
+    internal = S_MLI > 0
+    K_MLI = np.where(internal, 1.4, 3)
+    rho_ref = 2.78
+    vLV = np.where(internal, 2.0/cosang**1.5, 3/cosang**1.5)
+    delta_dcHV = np.where(internal, K_MLI*AD_MLI*(S_MLI/standoff)**(1/2), 0)
+    tb_tot = np.where(~internal & (AD_MLI > 0), bumper_thick+K_MLI*AD_MLI/rho_ref, bumper_thick)
+
+    ## define the transition velocities
+    vHV = 7/cosang
+
+    ## equation constants
+    kl = 1.9
+    tb_ratio = tb_tot/(wall_thick**(2/3)*standoff**(1/3))
+    kh = np.where(tb_ratio < 0.126, 1.35, 7.451*tb_ratio+0.411)
+
+    ## calculate the ballistic limit
+    dc_low = lambda vel: kl*(wall_thick*(wall_yield/40)**0.5+0.37*tb_tot*bumper_density)/ \
+        (cosang**(11/6)*proj_density**0.5*vel**(2/3))
+    dc_high = lambda vel: kh*(wall_thick*wall_density)**(2/3)*standoff**(1/2)*(wall_yield/70)**(1/3)/ \
+        (proj_density**(1/3)*bumper_density**(1/9)*(vel*cosang)**(2/3)) + delta_dcHV
+    dcLV = dc_low(vLV)
+    dcHV = dc_high(vHV)
+    dc_shatter = dcLV+(dcHV-dcLV)/(vHV-vLV)*(velocity-vLV)
+    dc = np.where(velocity <= vLV, dc_low(velocity), np.where(velocity >= vHV, dc_high(velocity), dc_shatter))
 
+    return dc
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 ## run the code to calculate critical diameter and generate ballistic limit curve
+## (equivalent to: python pyBLOSSUM.py run --ble modNNOwhipple <input_file>)
 if __name__ == "__main__":
 
-    from datetime import datetime
-
-    ## Create the parser
-    parser = argparse.ArgumentParser(description='Process analysis inputs and flags.')
-
-    ## Add the arguments
-    parser.add_argument('filename', type=str, help='The name and location of the file containing the analysis details, e.g., input_data/eval_example-foamSP.csv')
-    parser.add_argument('--data', action='store_true', help='Flag indicating that relevant test data should be included in the ballistic limit plot')
-
-    ## Parse the arguments
-    args = parser.parse_args()        
-
-    try:        
-        ## import the analysis details
-        root_dir = os.getcwd()
-        filename = args.filename
-        df_data = pd.read_csv(filename,skiprows=[1])
-
-        ## convert units
-        df_data['wall_yield'] *= 0.145038  # units = ksi        
-            
-        ## generate ballistic limit curves
-        velocities = np.linspace(0.1,15,150)
-        df_plot = pd.DataFrame(np.repeat(df_data.values, len(velocities), axis=0), columns=df_data.columns)  # takes the first row of the imported dataframe and duplicates it to match the size of the 'velocities' vector
-        df_plot['velocity'] = velocities
-        df_plot['dc_BLE-modNNOwhipple'] = df_plot.apply(modNNO_performance,axis=1)
-        
-        ## Get the current date and time
-        now = datetime.now()
-        now_str = now.strftime("%Y%m%d_%H%M%S")
-        
-        ## save the plot data to file
-        # Check if the "results" directory exists, and create it if it doesn't
-        results_dir = os.path.join(root_dir, "results")
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir)    
-        df_results = df_plot[['velocity', 'dc_BLE-modNNOwhipple']] 
-        df_results.to_csv(os.path.join(root_dir,"results",f"blc_data_{now_str}.csv"), index=False)     
-
-        ## save the configuration to file (for file name consistency)
-        df_data.to_csv(os.path.join(root_dir,"results",f"config_data_{now_str}.csv"), index=False)    
-
-        ## plot the results
-        plt.figure()
-        plt.plot(df_plot['velocity'],df_plot['dc_BLE-modNNOwhipple'],label='BLE-modNNOwhipple')
-        plt.xlabel('Velocity (km/s)')
-        plt.ylabel('Projectile diameter (cm)')
-
-        ## If the test data flag is set, plot the test data
-        if args.data:
-            # Load the test data
-            filename = 'database_whipple_pyBLOSSUM.csv'
-            df_test = pd.read_csv(os.path.join(root_dir,'data',filename),skiprows=[1])
-
-            # Filter the test data based on the selected values
-            lower_bound = 0.95
-            upper_bound = 1.05
-            mask = ((df_test['bumper_mat'].str[:9] == df_data['bumper_mat'][0][:9]) &  # allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials
-                    (df_test['bumper_thick'] >= lower_bound * df_data['bumper_thick'][0]) &
-                    (df_test['bumper_thick'] <= upper_bound * df_data['bumper_thick'][0]) &
-                    (df_test['standoff'] >= lower_bound * df_data['standoff'][0]) &
-                    (df_test['standoff'] <= upper_bound * df_data['standoff'][0]) &
-                    (df_test['wall_mat'].str[:9] == df_data['wall_mat'][0][:9]) &  # allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials
-                    (df_test['wall_thick'] >= lower_bound * df_data['wall_thick'][0]) &
-                    (df_test['wall_thick'] <= upper_bound * df_data['wall_thick'][0]) &
-                    (df_test['angle'] == df_data['angle'][0]))
-            df_filtered_test_data = df_test[mask]
-            df_NP = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 0]
-            df_P = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 1]
-            plt.scatter(df_NP['velocity'],df_NP['proj_diam'],edgecolors='black',facecolors='black',label='NP')
-            plt.scatter(df_P['velocity'],df_P['proj_diam'],edgecolors='black',facecolors='white',label='P')
-            df_filtered_test_data.to_csv(os.path.join(root_dir,"results",f"test_data_{now_str}.csv"), index=False) 
-
-        plt.ylim(0.0,2.0*df_plot['dc_BLE-modNNOwhipple'][len(velocities)/2])
-        plt.legend()
-        # plt.show()
-            
-        ## Save the plot
-        plt.savefig(os.path.join(root_dir,'results',f'plot_{now_str}.png'))
-
-        ## Print completion statements
-        print(f"Ballistic limit plot saved to file: plot_{now_str}.png")
-        print(f"Ballistic limit curve data saved to file: blc_data_{now_str}.csv")
-        print(f"Configuration data saved to file: config_data_{now_str}.csv")        
-
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-    finally:
-        # Code to clean up resources here
-        plt.close('all')
+    from cli import main
+    sys.exit(main(ble='modNNOwhipple'))
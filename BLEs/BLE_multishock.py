@@ -1,14 +1,5 @@
 import numpy as np
-import pandas as pd
-import os
 import sys
-from matplotlib import pyplot as plt
-import seaborn as sns
-import warnings
-
-plt.close('all')
-sns.set_theme()
-warnings.filterwarnings("ignore", category=RuntimeWarning)  ## supress runtime warnings
 
 '''
 References:
@@ -156,69 +147,96 @@ def multishockHybrid_performance(row):
     return dc
 
 
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def multishock_performance(row):
+    '''
+    Selects the multi-shock equation from the configuration 'type'
+    '''
+    performance = {
+        'nextel': multishockNextel_performance,
+        'kevlar': multishockKevlar_performance,
+        'aluminium': multishockAl_performance,
+        'hybrid': multishockHybrid_performance,
+    }.get(row['type'])
+    return np.nan if performance is None else performance(row)
+
+
+## coefficient table for multishock_performance_vec, one row per shield type:
+##   KL, KH, metallic rear wall (1) or fabric rear wall (0), vLV and its cosine exponent,
+##   vHV and its cosine exponent, maximum angle, low velocity cosine exponent (angle <= 45,
+##   angle > 45), hypervelocity exponent h
+## the hypervelocity limit is written as KH*W**h*S**(1-h)/(rho_p**(1/3)*(v*cos)**h), with
+## W the wall areal density (fabric) or wall_thick*wall_density*(wall_yield/40)**0.5 (metallic)
+## the last row (all NaN) is selected for unknown types
+MULTISHOCK_TYPES = ('nextel', 'kevlar', 'aluminium', 'hybrid')
+MULTISHOCK_COEFFS = np.array([
+    [2.7, 1.24/43.6**(1/3), 0, 2.4, 0.5, 6.4, 0.25, np.inf, 4/3, 4/3, 1/3],
+    [2.7, 1.24/29.0**(1/3), 0, 2.4, 0.5, 6.4, 0.25, np.inf, 4/3, 4/3, 1/3],
+    [2.0, 0.358, 1, 2.4, 0.5, 6.4, 0.25, np.inf, 4/3, 4/3, 1/3],
+    [2.0, 2.15, 1, 2.7, 0.5, 6.5, 2/3, 75, 7/3, 2, 2/3],
+    [np.nan]*11,
+])
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+@np.errstate(divide='ignore', invalid='ignore', over='ignore')
+def multishock_performance_vec(df):
+    '''
+    Array form of multishock_performance. Takes a DataFrame (or any mapping of column
+    name to array) and returns the critical diameter of every row as a numpy array. The
+    constants of the four shield types are looked up in MULTISHOCK_COEFFS from the
+    'type' codes, so mixed-type frames are evaluated in one pass
+    '''
+
+    ## define the equation constants
+    CL = 0.37  # units = cm3/g
+    CW = 0.5  # units = cm3/g
+
+    ## extract the inputs as arrays
+    shield_type = np.asarray(df['type'])
+    proj_density = np.asarray(df['proj_density'],dtype=float)
+    bumper_AD = np.asarray(df['bumper_AD'],dtype=float)
+    standoff = np.asarray(df['standoff'],dtype=float)
+    wall_thick = np.asarray(df['wall_thick'],dtype=float)
+    wall_density = np.asarray(df['wall_density'],dtype=float)
+    wall_AD = np.asarray(df['wall_AD'],dtype=float)
+    wall_yield = np.asarray(df['wall_yield'],dtype=float)
+    velocity = np.asarray(df['velocity'],dtype=float)
+    angle = np.asarray(df['angle'],dtype=float)
+
+    ## calculate the configuration-specific constants
+    type_code = np.select([shield_type == name for name in MULTISHOCK_TYPES], range(len(MULTISHOCK_TYPES)), -1)
+    KL, KH, metallic, vLV0, nLV, vHV0, nHV, angle_max, x_normal, x_oblique, h = np.moveaxis(MULTISHOCK_COEFFS[type_code], -1, 0)
+    metallic = metallic == 1
+    x = np.where(angle <= 45, x_normal, x_oblique)
+
+    ## handle the impact obliquity
+    anglerad = np.deg2rad(np.minimum(angle, angle_max))
+    cosang = np.cos(anglerad)
+
+    ## define the velocity regime transitions
+    vLV = vLV0/cosang**nLV
+    vHV = vHV0/cosang**nHV
+
+    ## rear wall terms of the low velocity and hypervelocity limits
+    QL = np.where(metallic, wall_thick*(wall_yield/40)**0.5, CW*wall_AD)+CL*bumper_AD
+    QH = np.where(metallic, wall_thick*wall_density*(wall_yield/40)**0.5, wall_AD)
+
+    ## Ballistic limit calculation
+    dc_low = lambda vel: KL*QL/(cosang**x*proj_density**0.5*vel**(2/3))
+    dc_high = lambda vel: KH*QH**h*standoff**(1-h)/(proj_density**(1/3)*(vel*cosang)**h)
+    dcLV = dc_low(vLV)
+    dcHV = dc_high(vHV)
+    dc_shatter = dcLV+(dcHV-dcLV)/(vHV-vLV)*(velocity-vLV)
+    dc = np.where(velocity <= vLV, dc_low(velocity), np.where(velocity >= vHV, dc_high(velocity), dc_shatter))
+
+    return dc
+
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 ## run the code to calculate critical diameter and generate ballistic limit curve
+## (equivalent to: python pyBLOSSUM.py run --ble multishock <input_file>)
 if __name__ == "__main__":
 
-    from datetime import datetime
-
-    try:        
-        ## import the analysis details
-        root_dir = os.getcwd()
-        filename = sys.argv[1]
-        df_data = pd.read_csv(filename,skiprows=[1])
-
-        ## convert units
-        df_data['wall_yield'] *= 0.145038  # units = ksi        
-        
-        ## generate ballistic limit curves
-        velocities = np.linspace(0.1,15,150)
-        df_plot = pd.DataFrame(np.repeat(df_data.values, len(velocities), axis=0), columns=df_data.columns)  # takes the first row of the imported dataframe and duplicates it to match the size of the 'velocities' vector
-        df_plot['velocity'] = velocities
-        if df_plot.iloc[0]['type'] == 'nextel':
-            df_plot['dc_BLE'] = df_plot.apply(multishockNextel_performance,axis=1)
-        if df_plot.iloc[0]['type'] == 'kevlar':
-            df_plot['dc_BLE'] = df_plot.apply(multishockKevlar_performance,axis=1)        
-        elif df_plot.iloc[0]['type'] == 'aluminium':
-            df_plot['dc_BLE'] = df_plot.apply(multishockAl_performance,axis=1)
-        elif df_plot.iloc[0]['type'] == 'hybrid':
-            df_plot['dc_BLE'] = df_plot.apply(multishockHybrid_performance,axis=1)
-        
-        ## Get the current date and time
-        now = datetime.now()
-        now_str = now.strftime("%Y%m%d_%H%M%S")
-        
-        ## save the plot data to file
-        # Check if the "results" directory exists, and create it if it doesn't
-        results_dir = os.path.join(root_dir, "results")
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir)    
-        df_results = df_plot[['velocity', 'dc_BLE']] 
-        df_results.to_csv(os.path.join(root_dir,"results",f"blc_data_{now_str}.csv"), index=False)     
-
-        ## save the configuration to file (for file name consistency)
-        df_data.to_csv(os.path.join(root_dir,"results",f"config_data_{now_str}.csv"), index=False)    
-
-        ## plot the results
-        plt.figure()
-        plt.plot(df_plot['velocity'],df_plot['dc_BLE'],label='BLE')
-        plt.xlabel('Velocity (km/s)')
-        plt.ylabel('Projectile diameter (cm)')
-        plt.ylim(0.0,2.0*df_plot['dc_BLE'][len(velocities)/2])
-        plt.legend()
-        # plt.show()
-        
-        ## Save the plot
-        plt.savefig(os.path.join(root_dir,'results',f'plot_{now_str}.png'))
-
-        ## Print completion statements
-        print(f"Ballistic limit plot saved to file: plot_{now_str}.png")
-        print(f"Ballistic limit curve data saved to file: blc_data_{now_str}.csv")
-        print(f"Configuration data saved to file: config_data_{now_str}.csv")             
-
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-    finally:
-        # Code to clean up resources here
-        plt.close('all')
\ No newline at end of file
+    from cli import main
+    sys.exit(main(ble='multishock'))
@@ -1,14 +1,5 @@
 import numpy as np
-import pandas as pd
-import os
 import sys
-from matplotlib import pyplot as plt
-import seaborn as sns
-import warnings
-
-plt.close('all')
-sns.set_theme()
-warnings.filterwarnings("ignore", category=RuntimeWarning)  ## supress runtime warnings
 
 '''
 References:
@@ -79,60 +70,66 @@ def singleWall_performance(row):
     return dc
 
 
-
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-## run the code to calculate critical diameter and generate ballistic limit curve
-if __name__ == "__main__":
+@np.errstate(divide='ignore', invalid='ignore', over='ignore')
+def singleWall_performance_vec(df):
+    '''
+    Array form of singleWall_performance. Takes a DataFrame (or any mapping of column
+    name to array) and returns the critical diameter of every row as a numpy array
+    '''
+
+    ## extract the inputs as arrays
+    shield_type = np.asarray(df['type'])
+    mode = np.asarray(df['mode'])
+    proj_density = np.asarray(df['proj_density'],dtype=float)
+    shield_thick = np.asarray(df['shield_thick'],dtype=float)
+    shield_density = np.asarray(df['shield_density'],dtype=float)
+    shield_HB = np.asarray(df['shield_HB'],dtype=float)
+    shield_C = np.asarray(df['shield_C'],dtype=float)
+    MLI_AD = np.asarray(df['MLI_AD'],dtype=float)
+    velocity = np.asarray(df['velocity'],dtype=float)
 
-    from datetime import datetime
+    ## convert the angle to radians
+    anglerad = np.deg2rad(np.asarray(df['angle'],dtype=float))
+
+    ## masks for the target types and failure modes
+    is_TI = shield_type == 'TI'
+    is_ST = shield_type == 'ST'
+    is_AL = shield_type == 'AL'
+    is_CFRP = shield_type == 'CFRP'
+    is_FG = shield_type == 'fibreglass'
+    is_metal = is_TI | is_ST | is_AL
+    is_composite = is_CFRP | is_FG
+    is_perforate = mode == 'perforate'
+    is_detached = mode == 'detached_spall'
+
+    ## calculate the configuration-specific constants (unknown types give NaN)
+    alpha = np.where(is_TI | is_AL, shield_HB**0.25, 1.0)
+    beta = np.where(is_AL & (proj_density/shield_density >= 1.5), 3/2, 0.5)
+    k = np.select([is_ST | is_FG | is_perforate,
+                   is_TI & is_detached,
+                   is_AL & is_detached],
+                  [1.8, 2.4, 2.2], 3.0)
+    K = np.select([is_TI | is_AL, is_ST, is_CFRP, is_FG],
+                  [5.24/shield_C**(2/3), 0.345, 0.62, 0.434], np.nan)
+    gamma = np.where(is_ST | is_AL, 18/19, 1.0)
+
+    ## account for MLI: metallic targets add a diameter increment [3], composites a thicker wall [4]
+    vn = velocity*np.cos(anglerad)
+    tb = np.where(is_composite & (MLI_AD > 0), shield_thick + 4.5*MLI_AD/shield_density, shield_thick)
+    delta_dc = np.where(is_metal & (MLI_AD > 0), 2.2*MLI_AD*proj_density**-0.47*vn**-0.63, 0.0)
 
-    try:        
-        ## import the analysis details
-        root_dir = os.getcwd()
-        filename = sys.argv[1]
-        df_data = pd.read_csv(filename,skiprows=[1])
+    ## Ballistic limit calculation
+    dc = (tb*alpha*(shield_density/proj_density)**beta/(k*K*vn**(2/3)))**gamma + delta_dc
+    dc = np.where(MLI_AD >= 0, dc, np.nan)
 
-        ## generate ballistic limit curves
-        velocities = np.linspace(0.1,15,150)
-        df_plot = pd.DataFrame(np.repeat(df_data.values, len(velocities), axis=0), columns=df_data.columns)  # takes the first row of the imported dataframe and duplicates it to match the size of the 'velocities' vector
-        df_plot['velocity'] = velocities
-        df_plot['dc_BLE'] = df_plot.apply(singleWall_performance,axis=1)
+    return dc
 
-        ## Get the current date and time
-        now = datetime.now()
-        now_str = now.strftime("%Y%m%d_%H%M%S")
-        
-        ## save the plot data to file
-        # Check if the "results" directory exists, and create it if it doesn't
-        results_dir = os.path.join(root_dir, "results")
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir)   
-        df_results = df_plot[['velocity', 'dc_BLE']]              
-        df_results.to_csv(os.path.join(root_dir,"results",f"blc_data_{now_str}.csv"), index=False)     
-
-        ## save the configuration to file (for file name consistency)
-        df_data.to_csv(os.path.join(root_dir,"results",f"config_data_{now_str}.csv"), index=False)    
-
-        ## plot the results
-        plt.figure()
-        plt.plot(df_plot['velocity'],df_plot['dc_BLE'],label='BLE')
-        plt.xlabel('Velocity (km/s)')
-        plt.ylabel('Projectile diameter (cm)')
-        plt.ylim(0.0,2.0*df_plot['dc_BLE'][len(velocities)/2])
-        plt.legend()
-        # plt.show()
-
-        ## Save the plot
-        plt.savefig(os.path.join(root_dir,'results',f'plot_{now_str}.png'))
-
-        ## Print completion statements
-        print(f"Ballistic limit plot saved to file: plot_{now_str}.png")
-        print(f"Ballistic limit curve data saved to file: blc_data_{now_str}.csv")
-        print(f"Configuration data saved to file: config_data_{now_str}.csv")             
-
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-    finally:
-        # Code to clean up resources here
-        plt.close('all')
\ No newline at end of file
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+## run the code to calculate critical diameter and generate ballistic limit curve
+## (equivalent to: python pyBLOSSUM.py run --ble singleWall <input_file>)
+if __name__ == "__main__":
+
+    from cli import main
+    sys.exit(main(ble='singleWall'))
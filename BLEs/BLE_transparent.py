@@ -1,14 +1,5 @@
 import numpy as np
-import pandas as pd
-import os
 import sys
-from matplotlib import pyplot as plt
-import seaborn as sns
-import warnings
-
-plt.close('all')
-sns.set_theme()
-warnings.filterwarnings("ignore", category=RuntimeWarning)  ## supress runtime warnings
 
 '''
 References:
@@ -59,63 +50,61 @@ def transparent_performance(row):
 
     return dc
 
- 
+
+## coefficient table for transparent_performance_vec, one row per material type:
+##   k (Perforate, Detached spall, other/Damage), Q, K1, alpha, beta, gamma
+## the last row (all NaN) is selected for unknown types
+TRANSPARENT_TYPES = ('Silica', 'Quartz', 'Polycarbonate')
+TRANSPARENT_COEFFS = np.array([
+    [2.0, 3.0, 7.0, 1.89, 30.9, 0.5, 2/3, 18/19],
+    [2.0, 3.0, 7.0, 1.32, 15.1, 0.5, 2/3, 18/19],
+    [1/1.04, 1/0.98, 1/0.65, 1, 1, 1/3, 1/3, 1],  # the max damage failure criteria is not valid for polycarbonate
+    [np.nan]*8,
+])
+
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-## run the code to calculate critical diameter and generate ballistic limit curve
-if __name__ == "__main__":
+@np.errstate(divide='ignore', invalid='ignore', over='ignore')
+def transparent_performance_vec(df):
+    '''
+    Array form of transparent_performance. Takes a DataFrame (or any mapping of column
+    name to array) and returns the critical diameter of every row as a numpy array. The
+    constants are looked up in TRANSPARENT_COEFFS from the (type, mode) codes
+    '''
 
-    from datetime import datetime
+    ## extract the inputs as arrays
+    window_type = np.asarray(df['type'])
+    mode = np.asarray(df['mode'])
+    proj_density = np.asarray(df['proj_density'],dtype=float)
+    thickness = np.asarray(df['thickness'],dtype=float)
+    max_damage = np.asarray(df['max_damage'],dtype=float)
+    velocity = np.asarray(df['velocity'],dtype=float)
 
-    try:        
-        ## import the analysis details
-        root_dir = os.getcwd()
-        filename = sys.argv[1]
-        df_data = pd.read_csv(filename,skiprows=[1])
+    ## convert to radians
+    anglerad = np.deg2rad(np.asarray(df['angle'],dtype=float))
 
-        ## convert units
-        df_data['wall_yield'] *= 0.145038  # units = ksi        
-        
-        ## generate ballistic limit curves
-        velocities = np.linspace(0.1,15,150)
-        df_plot = pd.DataFrame(np.repeat(df_data.values, len(velocities), axis=0), columns=df_data.columns)  # takes the first row of the imported dataframe and duplicates it to match the size of the 'velocities' vector
-        df_plot['velocity'] = velocities
-        df_plot['dc_BLE'] = df_plot.apply(transparent_performance,axis=1)
-        
-        ## Get the current date and time
-        now = datetime.now()
-        now_str = now.strftime("%Y%m%d_%H%M%S")
-        
-        ## save the plot data to file
-        # Check if the "results" directory exists, and create it if it doesn't
-        results_dir = os.path.join(root_dir, "results")
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir)    
-        df_results = df_plot[['velocity', 'dc_BLE']] 
-        df_results.to_csv(os.path.join(root_dir,"results",f"blc_data_{now_str}.csv"), index=False)     
-
-        ## save the configuration to file (for file name consistency)
-        df_data.to_csv(os.path.join(root_dir,"results",f"config_data_{now_str}.csv"), index=False)    
-        
-        ## plot the results
-        plt.figure()
-        plt.plot(df_plot['velocity'],df_plot['dc_BLE'],label='BLE')
-        plt.xlabel('Velocity (km/s)')
-        plt.ylabel('Projectile diameter (cm)')
-        plt.ylim(0.0,2.0*df_plot['dc_BLE'][len(velocities)/2])
-        plt.legend()
-        # plt.show()
-        
-        ## Save the plot
-        plt.savefig(os.path.join(root_dir,'results',f'plot_{now_str}.png'))
+    ## (type, mode) codes; any mode other than Perforate or Detached spall uses the third k
+    type_code = np.select([window_type == name for name in TRANSPARENT_TYPES], range(len(TRANSPARENT_TYPES)), -1)
+    mode_code = np.select([mode == 'Perforate', mode == 'Detached spall'], [0, 1], 2)
+    type_code, mode_code = np.broadcast_arrays(type_code, mode_code)
+
+    ## calculate the configuration-specific constants
+    coeffs = TRANSPARENT_COEFFS[type_code]
+    k = np.take_along_axis(coeffs[..., :3], mode_code[..., None], axis=-1)[..., 0]
+    Q, K1, alpha, beta, gamma = np.moveaxis(coeffs[..., 3:], -1, 0)
+
+    ## Ballistic limit calculation
+    dc_damage = (max_damage/(K1*proj_density**0.44*(velocity*np.cos(anglerad))**0.44))**(1/1.33)  # surface damage requirement
+    dc_penetration = (Q*thickness/(k*proj_density**alpha*velocity**(2/3)*(np.cos(anglerad))**beta))**gamma  # penetration-based requirement
+    dc = np.where(mode == 'Damage', dc_damage, dc_penetration)
+
+    return dc
 
-        ## Print completion statements
-        print(f"Ballistic limit plot saved to file: plot_{now_str}.png")
-        print(f"Ballistic limit curve data saved to file: blc_data_{now_str}.csv")
-        print(f"Configuration data saved to file: config_data_{now_str}.csv")               
 
-    except Exception as e:
-        print(f"An error occurred: {e}")
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+## run the code to calculate critical diameter and generate ballistic limit curve
+## (equivalent to: python pyBLOSSUM.py run --ble transparent <input_file>)
+if __name__ == "__main__":
 
-    finally:
-        # Code to clean up resources here
-        plt.close('all')
+    from cli import main
+    sys.exit(main(ble='transparent'))
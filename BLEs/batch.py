@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+import os
+from datetime import datetime
+from configs import evaluate_curves
+
+'''
+Batch evaluation of a BLE over many configurations in one process. Every row of the
+input file is treated as a separate configuration (identified by its zero-based row
+number, 'config_id') and evaluated over the same velocity vector. The results are
+written as a single long-format table with columns config_id, velocity, dc, converged
+(False where the iterative solve of a point did not converge) and, if several BLEs
+are evaluated in one run, ble.
+
+stream_batch evaluates an input that is delivered in chunks (e.g. pd.read_csv with
+chunksize) and appends the results of every chunk to the output files as it goes, so
+that the memory used is bounded by the chunk size rather than the size of the input.
+'''
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def evaluate_batch(df_data, performance, velocities, vectorized=False, curve_cache=None, workers=None, chunksize=None):
+    '''
+    Function to evaluate 'performance' for every configuration in df_data at every velocity.
+    'performance' is either a row function (used with DataFrame.apply) or, if vectorized
+    is True, an array kernel that takes the whole frame. If a CurveCache is given, cached
+    curves are reused and a 'cache_hit' column is added to the results. The 'converged'
+    column flags the points whose solve converged. 'workers' and 'chunksize' select a
+    parallel evaluation (see configs.evaluate_curves)
+    '''
+
+    if curve_cache is None:
+        dc, converged = evaluate_curves(df_data, performance, velocities, vectorized=vectorized, workers=workers, chunksize=chunksize,
+                                        return_converged=True)
+        hits = None
+    else:
+        dc, hits, converged = curve_cache.evaluate(performance, df_data, velocities, vectorized=vectorized, workers=workers,
+                                                   chunksize=chunksize, return_converged=True)
+
+    df_batch = pd.DataFrame({
+        'config_id': np.repeat(np.arange(len(df_data)), len(velocities)),
+        'velocity': np.tile(velocities, len(df_data)),
+        'dc': dc.ravel(),
+        'converged': converged.ravel(),
+    })
+    if hits is not None:
+        df_batch['cache_hit'] = np.repeat(hits, len(velocities))
+
+    return df_batch
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def evaluate_performances(df_data, performance, velocities, vectorized=False, curve_cache=None, workers=None, chunksize=None):
+    '''
+    Function to run evaluate_batch for one performance function, or for each of a dict of
+    BLE name -> performance function (adding a 'ble' column to the results)
+    '''
+    if not isinstance(performance, dict):
+        return evaluate_batch(df_data, performance, velocities, vectorized=vectorized, curve_cache=curve_cache,
+                              workers=workers, chunksize=chunksize)
+
+    df_batch = []
+    for name, func in performance.items():
+        df_batch.append(evaluate_batch(df_data, func, velocities, vectorized=vectorized, curve_cache=curve_cache,
+                                       workers=workers, chunksize=chunksize))
+        df_batch[-1].insert(0, 'ble', name)
+    return pd.concat(df_batch, ignore_index=True)
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def results_directory(root_dir):
+    '''
+    Function to return the 'results' directory, creating it if it doesn't exist
+    '''
+    results_dir = os.path.join(root_dir, "results")
+    if not os.path.exists(results_dir):
+        os.makedirs(results_dir)
+    return results_dir
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def run_batch(df_data, performance, root_dir, vectorized=False, velocities=None, curve_cache=None, workers=None, chunksize=None):
+    '''
+    Function to evaluate all configurations in df_data and save the consolidated results
+    (blc_batch_<date_time>.csv) and the configurations (config_data_<date_time>.csv, with
+    a config_id column) to the 'results' directory. 'performance' may also be a dict of
+    BLE name -> performance function, in which case the results of every BLE are saved
+    to the same table with a 'ble' column. 'workers' and 'chunksize' are passed on to
+    evaluate_batch
+    '''
+
+    if velocities is None:
+        velocities = np.linspace(0.1,15,150)
+
+    df_batch = evaluate_performances(df_data, performance, velocities, vectorized=vectorized, curve_cache=curve_cache,
+                                     workers=workers, chunksize=chunksize)
+
+    ## Get the current date and time
+    now_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+    results_dir = results_directory(root_dir)
+
+    ## save the results and the configurations to file
+    df_batch.to_csv(os.path.join(results_dir, f"blc_batch_{now_str}.csv"), index=False)
+    df_config = df_data.copy()
+    df_config.insert(0, 'config_id', np.arange(len(df_data)))
+    df_config.to_csv(os.path.join(results_dir, f"config_data_{now_str}.csv"), index=False)
+
+    ## Print completion statements
+    print(f"Ballistic limit curves for {len(df_data)} configurations saved to file: blc_batch_{now_str}.csv")
+    print(f"Configuration data saved to file: config_data_{now_str}.csv")
+    print(f"Unconverged points: {int((~df_batch['converged']).sum())} of {len(df_batch)}")
+    if curve_cache is not None:
+        n_hits = int(df_batch.groupby(['ble', 'config_id'] if 'ble' in df_batch else 'config_id')['cache_hit'].first().sum())
+        print(f"Cache hits: {n_hits} of {len(df_batch)//len(velocities)} curves ({curve_cache.cache_dir})")
+
+    return df_batch
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def stream_batch(chunks, performance, root_dir, vectorized=False, velocities=None, curve_cache=None, workers=None, chunksize=None):
+    '''
+    Function to evaluate the configurations delivered by the iterable 'chunks' (of
+    DataFrames, e.g. pd.read_csv(..., chunksize=n)) one chunk at a time, appending the
+    results to blc_batch_<date_time>.csv and the configurations to
+    config_data_<date_time>.csv as in run_batch. The config_id keeps counting across
+    chunks (with several BLEs, the rows of each BLE are grouped per chunk rather than
+    over the whole input). Returns the number of configurations evaluated
+    '''
+
+    if velocities is None:
+        velocities = np.linspace(0.1,15,150)
+
+    ## Get the current date and time
+    now_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+    results_dir = results_directory(root_dir)
+    batch_path = os.path.join(results_dir, f"blc_batch_{now_str}.csv")
+    config_path = os.path.join(results_dir, f"config_data_{now_str}.csv")
+
+    n_configs = 0
+    n_curves = 0
+    n_hits = 0
+    n_unconverged = 0
+    for df_chunk in chunks:
+        df_chunk = df_chunk.reset_index(drop=True)
+        df_batch = evaluate_performances(df_chunk, performance, velocities, vectorized=vectorized, curve_cache=curve_cache,
+                                         workers=workers, chunksize=chunksize)
+        df_batch['config_id'] += n_configs
+        df_config = df_chunk.copy()
+        df_config.insert(0, 'config_id', n_configs+np.arange(len(df_chunk)))
+
+        ## write the first chunk (with the header) and append the following ones
+        first = (n_configs == 0)
+        df_batch.to_csv(batch_path, mode='w' if first else 'a', header=first, index=False)
+        df_config.to_csv(config_path, mode='w' if first else 'a', header=first, index=False)
+
+        n_configs += len(df_chunk)
+        n_curves += len(df_batch)//len(velocities)
+        n_unconverged += int((~df_batch['converged']).sum())
+        if curve_cache is not None:
+            n_hits += int(df_batch.groupby(['ble', 'config_id'] if 'ble' in df_batch else 'config_id')['cache_hit'].first().sum())
+
+    ## Print completion statements
+    print(f"Ballistic limit curves for {n_configs} configurations saved to file: blc_batch_{now_str}.csv")
+    print(f"Configuration data saved to file: config_data_{now_str}.csv")
+    print(f"Unconverged points: {n_unconverged} of {n_curves*len(velocities)}")
+    if curve_cache is not None:
+        print(f"Cache hits: {n_hits} of {n_curves} curves ({curve_cache.cache_dir})")
+
+    return n_configs
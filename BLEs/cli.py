@@ -0,0 +1,285 @@
+import numpy as np
+import pandas as pd
+import os
+import sys
+import argparse
+from datetime import datetime
+from registry import REGISTRY, COLUMN_UNITS, get_ble, load_kernel, check_columns, convert_units
+
+'''
+Headless command line interface shared by every BLE: 'python pyBLOSSUM.py run --ble <name>
+<input_file>' (or 'python BLEs/BLE_<name>.py <input_file>', which forwards here). The BLEs
+are looked up in the registry, so several BLEs can be evaluated over the same input file
+in one process, e.g.
+    python pyBLOSSUM.py run --ble JSCwhipple --ble NNOwhipple input_files/eval_example-whipple.csv --data
+'''
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def build_parser(prog=None):
+    '''
+    Function to create the argument parser of the 'run' command
+    '''
+    parser = argparse.ArgumentParser(prog=prog, description='Process analysis inputs and flags.')
+    parser.add_argument('filename', type=str, nargs='?', help='The name and location of the file containing the analysis details, e.g., input_files/eval_example-foamSP.csv')
+    parser.add_argument('--ble', action='append', choices=list(REGISTRY), metavar='NAME', help=f"BLE to evaluate (may be repeated), one of: {', '.join(REGISTRY)}")
+    parser.add_argument('--data', action='store_true', help='Flag indicating that relevant test data should be included in the ballistic limit plot')
+    parser.add_argument('--batch', action='store_true', help='Flag indicating that every row of the input file is a separate configuration to be evaluated (no plot)')
+    parser.add_argument('--list', action='store_true', help='List the available BLEs with their required input columns and units')
+    parser.add_argument('--rows', action='store_true', help='Evaluate with the row functions (the reference implementations) instead of the array kernels')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes to evaluate the curves with (default: serial)')
+    parser.add_argument('--chunksize', type=int, default=None, help='Number of (configuration, velocity) points per worker task (default: about four tasks per worker)')
+    parser.add_argument('--sweep', action='append', metavar='COLUMN=VALUES', help="Sweep an input column (or velocity) over 'start:stop:num' or a comma-separated list of values, in the units listed by --list (may be repeated); the other columns are taken from the first row of the input file and the grid is saved to a .npz file")
+    parser.add_argument('--stream', type=int, default=None, metavar='ROWS', help='With --batch: read, evaluate and save the input file ROWS configurations at a time (bounded memory, no curve cache)')
+    return parser
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def list_bles():
+    '''
+    Function to print the registered BLEs with their required input columns and units
+    '''
+    for name, ble in REGISTRY.items():
+        print(f"{name} ({ble.module}.{ble.kernel})")
+        print("    "+", ".join(f"{col} ({COLUMN_UNITS[col]})" for col in ble.columns))
+        for config_type, columns in (ble.type_columns or {}).items():
+            print(f"    type = {config_type}: "+", ".join(f"{col} ({COLUMN_UNITS[col]})" for col in columns))
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def read_input(filename):
+    '''
+    Function to read an input file (header, units row, one configuration per row) and
+    return the configurations converted to the units expected by the BLEs
+    '''
+    units = pd.read_csv(filename, nrows=1, dtype=str).iloc[0].to_dict()
+    df_data = pd.read_csv(filename, skiprows=[1])
+    df_data, notes = convert_units(df_data, units)
+    for note in notes:
+        print(f"Note: {note}")
+    return df_data
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def read_input_chunks(filename, chunksize, names=()):
+    '''
+    Generator form of read_input for large input files: yields the configurations
+    'chunksize' rows at a time, converted to the units expected by the BLEs (the units
+    row is read once) and checked for the columns required by the BLEs 'names'
+    '''
+    units = pd.read_csv(filename, nrows=1, dtype=str).iloc[0].to_dict()
+    with pd.read_csv(filename, skiprows=[1], chunksize=chunksize) as reader:
+        for i, df_chunk in enumerate(reader):
+            df_chunk, notes = convert_units(df_chunk.reset_index(drop=True), units)
+            if i == 0:
+                for note in notes:
+                    print(f"Note: {note}")
+            for name in names:
+                check_columns(name, df_chunk)
+            yield df_chunk
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def match_test_data(name, df_data, root_dir):
+    '''
+    Function to return the experiments of a BLE's database that match the first
+    configuration in df_data (or None if the BLE has no database for it). Materials are
+    matched on their first 9 characters, which allows for e.g., AA6061-T651 and AA6061-T6
+    to be handled as common materials
+    '''
+    from test_data import load_test_matcher
+
+    ble = get_ble(name)
+    if ble.test_data is None or (ble.test_types is not None and df_data['type'][0] not in ble.test_types):
+        return None
+
+    matcher = load_test_matcher(ble.test_data, root_dir)
+    return matcher.match(
+        materials={'bumper_mat': df_data['bumper_mat'][0], 'wall_mat': df_data['wall_mat'][0]},
+        ranges={col: sum(df_data[c][0] for c in inputs) for col, inputs in ble.test_ranges.items()},
+        equal={'angle': df_data['angle'][0]},
+        tolerance=0.05)
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def run(filename, names, data=False, batch=False, root_dir=None, vectorized=True, workers=None, chunksize=None, stream=None, axes=None):
+    '''
+    Function to evaluate the BLEs 'names' over the configuration in 'filename' and save
+    the ballistic limit plot, curve data and configuration data (or, in batch mode, the
+    consolidated batch results of every configuration in the file) to the 'results'
+    directory. Without batch mode the file must hold exactly one configuration. The curves are evaluated with
+    the array kernels, or the row functions if vectorized is False, optionally over a
+    process pool (see configs.evaluate_curves). With 'stream' (a number of rows), the
+    batch is read, evaluated and saved that many rows at a time (see batch.stream_batch).
+    With 'axes' (column -> values), the BLEs are swept over the grid of the axes around
+    the first configuration instead (see sweep.sweep)
+    '''
+    from batch import run_batch, stream_batch
+    from curve_cache import CurveCache
+
+    root_dir = os.getcwd() if root_dir is None else root_dir
+    kernels = {name: load_kernel(name, vectorized=vectorized) for name in names}
+
+    ## streamed batch mode: the input file is never held in memory as a whole, and the
+    ## curve cache is bypassed (millions of per-curve files would only churn through it)
+    if batch and stream is not None:
+        stream_batch(read_input_chunks(filename, stream, names), kernels if len(names) > 1 else kernels[names[0]], root_dir,
+                     vectorized=vectorized, workers=workers, chunksize=chunksize)
+        return
+
+    ## sweep mode: a labelled grid around the first configuration
+    if axes:
+        run_sweep(filename, names, axes, root_dir, vectorized=vectorized, workers=workers, chunksize=chunksize)
+        return
+
+    ## import the analysis details
+    curve_cache = CurveCache(os.path.join(root_dir, "cache", "curves"))
+    df_data = read_input(filename)
+    for name in names:
+        check_columns(name, df_data)
+
+    ## batch mode: evaluate every row of the input file as a separate configuration
+    if batch:
+        run_batch(df_data, kernels if len(names) > 1 else kernels[names[0]], root_dir, vectorized=vectorized, curve_cache=curve_cache,
+                  workers=workers, chunksize=chunksize)
+        return
+
+    ## the plot, curve data and configuration data describe a single configuration
+    if len(df_data) != 1:
+        raise ValueError(f"{filename} contains {len(df_data)} configurations, but a ballistic limit plot is drawn for exactly one; "
+                         "use --batch to evaluate every row as a separate configuration")
+
+    ## generate ballistic limit curves (the output columns are named per BLE when several are run)
+    velocities = np.linspace(0.1,15,150)
+    df_plot = pd.DataFrame({'velocity': velocities})
+    curves = []
+    for name, kernel in kernels.items():
+        ble = get_ble(name)
+        column, label = (ble.column, ble.label) if len(names) == 1 else (f"dc_BLE-{name}", f"BLE-{name}")
+        dc, hits, converged = curve_cache.evaluate(kernel, df_data, velocities, vectorized=vectorized, workers=workers,
+                                                   chunksize=chunksize, return_converged=True)
+        df_plot[column] = dc[0]
+        curves.append((column, label, dc))
+        print(f"Ballistic limit curve ({name}): cache {'hit' if hits.all() else 'miss'} ({curve_cache.cache_dir})")
+        print(f"Unconverged points ({name}): {int((~converged).sum())} of {converged.size}")
+
+    ## Get the current date and time
+    now_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    ## save the plot data to file
+    # Check if the "results" directory exists, and create it if it doesn't
+    results_dir = os.path.join(root_dir, "results")
+    if not os.path.exists(results_dir):
+        os.makedirs(results_dir)
+    df_results = df_plot[['velocity']+[column for column, _, _ in curves]]
+    df_results.to_csv(os.path.join(results_dir, f"blc_data_{now_str}.csv"), index=False)
+
+    ## save the configuration to file (for file name consistency)
+    df_data.to_csv(os.path.join(results_dir, f"config_data_{now_str}.csv"), index=False)
+
+    ## plot the results (the plotting packages are only imported here, so batch runs do not load them)
+    from matplotlib import pyplot as plt
+    import seaborn as sns
+    sns.set_theme()
+    plt.figure()
+    for column, label, _ in curves:
+        plt.plot(df_plot['velocity'], df_plot[column], label=label)
+    plt.xlabel('Velocity (km/s)')
+    plt.ylabel('Projectile diameter (cm)')
+
+    ## If the test data flag is set, plot the test data of the BLEs' databases (each database once)
+    if data:
+        matched = {}
+        for name in names:
+            ble = get_ble(name)
+            if ble.test_data in matched:
+                continue
+            df_filtered_test_data = match_test_data(name, df_data, root_dir)
+            if df_filtered_test_data is None:
+                print(f"No test data available for {name}")
+                continue
+            matched[ble.test_data] = df_filtered_test_data
+        if matched:
+            df_filtered_test_data = pd.concat(matched.values(), ignore_index=True)
+            df_NP = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 0]
+            df_P = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 1]
+            plt.scatter(df_NP['velocity'],df_NP['proj_diam'],edgecolors='black',facecolors='black',label='NP')
+            plt.scatter(df_P['velocity'],df_P['proj_diam'],edgecolors='black',facecolors='white',label='P')
+            df_filtered_test_data.to_csv(os.path.join(results_dir, f"test_data_{now_str}.csv"), index=False)
+
+    plt.ylim(0.0,2.0*np.nanmax([dc[0,len(velocities)//2] for _, _, dc in curves]))
+    plt.legend()
+
+    ## Save the plot
+    plt.savefig(os.path.join(results_dir, f'plot_{now_str}.png'))
+    plt.close('all')
+
+    ## Print completion statements
+    print(f"Ballistic limit plot saved to file: plot_{now_str}.png")
+    print(f"Ballistic limit curve data saved to file: blc_data_{now_str}.csv")
+    print(f"Configuration data saved to file: config_data_{now_str}.csv")
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def run_sweep(filename, names, axes, root_dir, vectorized=True, workers=None, chunksize=None):
+    '''
+    Function to sweep the BLEs 'names' over the grid of 'axes' around the first
+    configuration in 'filename' and save each sweep to sweep_<BLE>_<date_time>.npz in
+    the 'results' directory
+    '''
+    from sweep import sweep
+
+    df_data = read_input(filename)
+    now_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+    results_dir = os.path.join(root_dir, "results")
+    if not os.path.exists(results_dir):
+        os.makedirs(results_dir)
+
+    for name in names:
+        result = sweep(name, df_data, axes, vectorized=vectorized, workers=workers, chunksize=chunksize)
+        result.save(os.path.join(results_dir, f"sweep_{name}_{now_str}.npz"))
+        print(f"Sweep of {name} over {' x '.join(f'{dim} ({len(result.coords[dim])})' for dim in result.dims)} saved to file: sweep_{name}_{now_str}.npz")
+        print(f"Unconverged points ({name}): {int((~result.converged).sum())} of {result.converged.size}")
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def main(argv=None, ble=None, prog=None):
+    '''
+    Entry point of the 'run' command. 'ble' is the default BLE of a BLE module run as a
+    script (python BLEs/BLE_<name>.py <input_file>)
+    '''
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+
+    if args.list:
+        list_bles()
+        return 0
+    names = args.ble or ([ble] if ble is not None else None)
+    if args.filename is None or names is None:
+        parser.error('an input file and at least one --ble are required')
+    names = list(dict.fromkeys(names))  # drop repeats, keep the order
+    if args.stream is not None and (not args.batch or args.stream < 1):
+        parser.error('--stream requires --batch and a positive number of rows')
+    if args.sweep and args.batch:
+        parser.error('--sweep cannot be combined with --batch')
+
+    try:
+        axes = None
+        if args.sweep:
+            from sweep import parse_axis
+            axes = {}
+            for spec in args.sweep:
+                col, sep, values = spec.partition('=')
+                if not sep:
+                    raise ValueError(f"--sweep expects COLUMN=VALUES, got '{spec}'")
+                axes[col.strip()] = parse_axis(values)
+        run(args.filename, names, data=args.data, batch=args.batch, vectorized=not args.rows,
+            workers=args.workers, chunksize=args.chunksize, stream=args.stream, axes=axes)
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
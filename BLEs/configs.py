@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+import inspect
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+'''
+Typed representation of a set of BLE configurations evaluated over a velocity vector.
+Numeric fields are stored as contiguous float64 column vectors of shape (n, 1) and
+material/type strings as integer codes into a small array of categories, while the
+velocities are a row vector of shape (1, m). Indexing a ConfigSet by column name
+returns arrays that broadcast to (n, m), so the vectorised BLE kernels (which read
+their inputs with np.asarray(df['col'])) evaluate every configuration at every
+velocity without materialising the n*m copy of the configuration data.
+ConfigSet.from_columns builds a set without a DataFrame, with the values shared by
+every configuration stored once as broadcast views (see sweep.py).
+
+evaluate_curves can spread the work over a process pool (workers > 1). Row functions
+are split into chunks of (configuration, velocity) points and array kernels into
+chunks of whole curves; the chunks are evaluated exactly as in the serial path and
+reassembled in order, so the results are identical to a serial evaluation.
+
+Array kernels that solve an implicit equation iteratively accept return_converged=True
+and then also return a boolean array flagging the points whose solve converged;
+evaluate_curves(..., return_converged=True) passes this on. Row functions and kernels
+without an iterative solve report every point as converged.
+'''
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+class ConfigSet:
+    '''
+    Configurations (rows of df_data) broadcast against a velocity vector
+    '''
+
+    def __init__(self, df_data, velocities):
+
+        self.velocities = np.ascontiguousarray(velocities, dtype=float).reshape(1,-1)
+        self.n_configs = len(df_data)
+        self.columns = [col for col in df_data.columns if col != 'velocity']
+
+        ## numeric fields as float64 column vectors, everything else as categorical codes
+        self.numeric = {}
+        self.codes = {}
+        self.categories = {}
+        for col in self.columns:
+            values = df_data[col]
+            if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                self.numeric[col] = np.ascontiguousarray(values, dtype=float).reshape(-1,1)
+            else:
+                codes, categories = pd.factorize(values)  # missing values are given code -1
+                self.codes[col] = codes.reshape(-1,1)
+                self.categories[col] = np.asarray(categories, dtype=str)
+
+    @classmethod
+    def from_columns(cls, columns, n_configs, velocities):
+        '''
+        Builds a ConfigSet from column -> value: a numeric array of length n_configs, or
+        a single number or string shared by every configuration, which is stored as a
+        broadcast (n, 1) view (strings as one category) rather than repeated
+        '''
+        self = cls.__new__(cls)
+        self.velocities = np.ascontiguousarray(velocities, dtype=float).reshape(1,-1)
+        self.n_configs = n_configs
+        self.columns = [col for col in columns if col != 'velocity']
+
+        self.numeric = {}
+        self.codes = {}
+        self.categories = {}
+        for col in self.columns:
+            value = columns[col]
+            if np.ndim(value) > 0:
+                self.numeric[col] = np.ascontiguousarray(value, dtype=float).reshape(-1,1)
+            elif isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_)):
+                self.numeric[col] = np.broadcast_to(float(value), (n_configs, 1))
+            else:
+                missing = value is None
+                self.codes[col] = np.broadcast_to(-1 if missing else 0, (n_configs, 1))
+                self.categories[col] = np.asarray([] if missing else [value], dtype=str)
+        return self
+
+    def subset(self, start, stop):
+        '''
+        Returns the configurations start:stop (over the same velocities) as a ConfigSet
+        '''
+        subset = ConfigSet.__new__(ConfigSet)
+        subset.velocities = self.velocities
+        subset.columns = self.columns
+        subset.numeric = {col: values[start:stop] for col, values in self.numeric.items()}
+        subset.codes = {col: codes[start:stop] for col, codes in self.codes.items()}
+        subset.categories = self.categories
+        subset.n_configs = len(range(self.n_configs)[start:stop])
+        return subset
+
+    @property
+    def shape(self):
+        return (self.n_configs, self.velocities.shape[1])
+
+    def __len__(self):
+        return self.n_configs
+
+    def __contains__(self, col):
+        return col == 'velocity' or col in self.columns
+
+    def keys(self):
+        return self.columns+['velocity']
+
+    def __getitem__(self, col):
+        '''
+        Returns the (n, 1) float64 or string array for a configuration field, or the
+        (1, m) velocity vector. Missing strings are returned as ''
+        '''
+        if col == 'velocity':
+            return self.velocities
+        if col in self.numeric:
+            return self.numeric[col]
+        if col in self.codes:
+            return np.append(self.categories[col], '')[self.codes[col]]
+        raise KeyError(col)
+
+    def ravel(self, values):
+        '''
+        Broadcasts a kernel result to (n, m) and flattens it configuration by
+        configuration, i.e. in the row order of to_frame()
+        '''
+        return np.broadcast_to(np.asarray(values, dtype=float), self.shape).ravel()
+
+    def to_frame(self):
+        '''
+        Long-format DataFrame with one row per (configuration, velocity) pair, for the
+        row functions used with DataFrame.apply. Numeric columns keep their float64
+        dtype and string columns are categorical
+        '''
+        n, m = self.shape
+        data = {}
+        for col in self.columns:
+            if col in self.numeric:
+                data[col] = np.repeat(self.numeric[col].ravel(), m)
+            else:
+                data[col] = pd.Categorical.from_codes(np.repeat(self.codes[col].ravel(), m), categories=self.categories[col])
+        data['velocity'] = np.tile(self.velocities.ravel(), n)
+
+        return pd.DataFrame(data)
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def evaluate_points(df_points, performance):
+    '''
+    Function to evaluate a row function over a long-format frame of (configuration,
+    velocity) points (one chunk of a parallel evaluation)
+    '''
+    return df_points.apply(performance, axis=1).to_numpy(dtype=float)
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def reports_convergence(performance):
+    '''
+    Function to check whether an array kernel accepts return_converged
+    '''
+    try:
+        return 'return_converged' in inspect.signature(performance).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def evaluate_curves(df_data, performance, velocities, vectorized=False, workers=None, chunksize=None, return_converged=False):
+    '''
+    Function to evaluate 'performance' for every configuration in df_data at every
+    velocity, returning an (n, m) float array. 'performance' is either a row function
+    (used with DataFrame.apply) or, if vectorized is True, an array kernel. With
+    workers > 1 the evaluation is split over a pool of that many processes, in chunks of
+    'chunksize' (configuration, velocity) points (rounded to whole curves for array
+    kernels; by default about four chunks per worker). The default is serial. With
+    return_converged=True an (n, m) boolean array flagging the converged points is
+    returned as well. df_data may also be a ConfigSet, which is evaluated over its own
+    velocities
+    '''
+
+    config_set = df_data if isinstance(df_data, ConfigSet) else ConfigSet(df_data, velocities)
+    velocities = config_set.velocities.ravel()
+    n, m = config_set.shape
+    if workers is not None and workers > 1 and n*m > 1:
+        if chunksize is None:
+            chunksize = -(-n*m//(4*workers))
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            if vectorized:
+                ## chunks of whole configurations, each evaluated as its own ConfigSet
+                step = max(1, chunksize//m)
+                chunks = [config_set.subset(i, i+step) for i in range(0, n, step)]
+                results = list(pool.map(evaluate_curves, chunks, repeat(performance), repeat(velocities), repeat(True),
+                                        repeat(None), repeat(None), repeat(True)))
+                dc = np.concatenate([dc for dc, _ in results])
+                converged = np.concatenate([converged for _, converged in results])
+            else:
+                ## chunks of (configuration, velocity) points of the long-format frame
+                df_points = config_set.to_frame()
+                chunks = [df_points.iloc[i:i+chunksize] for i in range(0, n*m, chunksize)]
+                dc = np.concatenate(list(pool.map(evaluate_points, chunks, repeat(performance)))).reshape(n, m)
+                converged = np.ones((n, m), dtype=bool)
+        return (dc, converged) if return_converged else dc
+
+    converged = np.ones(config_set.shape, dtype=bool)
+    if vectorized and reports_convergence(performance):
+        dc, converged = performance(config_set, return_converged=True)
+        dc = np.broadcast_to(np.asarray(dc, dtype=float), config_set.shape)
+        converged = np.broadcast_to(converged, config_set.shape)
+    elif vectorized:
+        dc = np.broadcast_to(np.asarray(performance(config_set), dtype=float), config_set.shape)
+    else:
+        dc = evaluate_points(config_set.to_frame(), performance).reshape(config_set.shape)
+
+    return (np.array(dc), np.array(converged)) if return_converged else np.array(dc)
@@ -0,0 +1,190 @@
+import numpy as np
+import os
+import json
+import hashlib
+import inspect
+import ast
+from functools import lru_cache
+from configs import evaluate_curves
+
+'''
+Persistent, content-addressed cache of computed ballistic limit curves. Each curve
+(one configuration over one velocity grid) is stored as a .npy file named by the
+SHA-256 hash of:
+    - the BLE name (module and function name of the performance function),
+    - the BLE version (hash of the source files that define the performance function),
+    - the normalised configuration row (column names and values, order-independent),
+    - the velocity grid (float64 bytes).
+Editing a BLE therefore invalidates its cached curves automatically. The cache is
+bounded in size: files are touched on every hit and the least recently used ones are
+evicted once the total size exceeds max_bytes.
+
+Each file holds a (2, m) array: the critical diameters and, as 0/1, the flags of the
+points whose solve converged (see configs.evaluate_curves). Files of any other shape
+(e.g. from before the flags were stored) are treated as misses.
+'''
+
+## default size bound for the cache directory
+MAX_BYTES = 64*1024**2
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+@lru_cache(maxsize=None)
+def source_hash(path):
+    '''
+    Function to calculate the SHA-256 hash of a source file (the BLE version)
+    '''
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def ble_identity(performance):
+    '''
+    Function to return the (name, version) of a performance function, e.g.
+    ('BLE_foamSP.foamSP_performance', <hash>). The module name is taken from the source
+    file so that a BLE run as a script (__main__) shares its curves with the GUIs. The
+    version covers the defining file and any helper modules it imports from the same
+    directory (e.g. solvers.py)
+    '''
+    path = inspect.getsourcefile(performance)
+    module = os.path.splitext(os.path.basename(path))[0]
+
+    ## helper modules imported at the top level of the BLE from the same directory
+    with open(path, 'rb') as file:
+        tree = ast.parse(file.read())
+    paths = {path}
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            helper = os.path.join(os.path.dirname(path), f"{name}.py")
+            if os.path.isfile(helper):
+                paths.add(helper)
+    version = hashlib.sha256(''.join(source_hash(p) for p in sorted(paths)).encode()).hexdigest()
+
+    return f"{module}.{performance.__qualname__}", version
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def normalise_value(value):
+    '''
+    Function to give a configuration value a canonical form: numbers as floats (so that
+    e.g. 10 and 10.0 match), missing values as None and everything else as a stripped string
+    '''
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    return str(value).strip()
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def curve_key(name, version, row, velocities):
+    '''
+    Function to calculate the cache key of one configuration row over a velocity grid
+    '''
+    config = {str(col): normalise_value(value) for col, value in row.items() if col != 'velocity'}
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps([name, version, config], sort_keys=True).encode())
+    hasher.update(np.ascontiguousarray(velocities, dtype=float).tobytes())
+    return hasher.hexdigest()
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+class CurveCache:
+    '''
+    Size-bounded LRU cache of ballistic limit curves in 'cache_dir'
+    '''
+
+    def __init__(self, cache_dir, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, key):
+        '''
+        Returns the cached curve for 'key' (marking it as recently used), or None
+        '''
+        path = self.path(key)
+        try:
+            dc = np.load(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return dc
+
+    def put(self, key, dc, evict=True):
+        '''
+        Stores a curve (the (2, m) diameters and convergence flags) under 'key' and evicts
+        the least recently used curves if needed
+        '''
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        ## write to a temporary file first so that readers never see a partial curve
+        tmp_path = self.path(key)+f".{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            np.save(file, np.asarray(dc, dtype=float))
+        os.replace(tmp_path, self.path(key))
+        if evict:
+            self.evict()
+
+    def evict(self):
+        '''
+        Removes the least recently used curves until the cache is within max_bytes
+        '''
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.npy'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def evaluate(self, performance, df_data, velocities, vectorized=False, workers=None, chunksize=None, return_converged=False):
+        '''
+        Returns the (n, m) critical diameters of the configurations in df_data over
+        'velocities' and a boolean array flagging the configurations served from the
+        cache (and, with return_converged=True, the (n, m) flags of the converged points).
+        Only the missing configurations are evaluated (see evaluate_curves, which also
+        describes the parallel 'workers' and 'chunksize' options)
+        '''
+        name, version = ble_identity(performance)
+        velocities = np.asarray(velocities, dtype=float)
+        keys = [curve_key(name, version, row, velocities) for _, row in df_data.iterrows()]
+
+        dc = np.full((len(df_data), len(velocities)), np.nan)
+        converged = np.ones((len(df_data), len(velocities)), dtype=bool)
+        hits = np.zeros(len(df_data), dtype=bool)
+        for i, key in enumerate(keys):
+            cached = self.get(key)
+            if cached is not None and cached.shape == (2, len(velocities)):
+                dc[i] = cached[0]
+                converged[i] = cached[1] > 0
+                hits[i] = True
+
+        misses = np.flatnonzero(~hits)
+        if len(misses) > 0:
+            dc[misses], converged[misses] = evaluate_curves(df_data.iloc[misses], performance, velocities, vectorized=vectorized,
+                                                            workers=workers, chunksize=chunksize, return_converged=True)
+            for i in misses:
+                self.put(keys[i], np.stack([dc[i], converged[i]]), evict=False)
+            self.evict()
+
+        return (dc, hits, converged) if return_converged else (dc, hits)
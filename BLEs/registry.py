@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+import importlib
+from collections import namedtuple
+
+'''
+Registry of the BLEs available to the command line interface (pyBLOSSUM.py run). Each
+entry maps a BLE name (the suffix of its BLE_<name>.py module) to its vectorised
+kernel, the input columns the kernel requires, the name and plot label of its output
+column and the experimental database used for the test-data overlay. The kernels are
+only imported when an entry is used.
+
+The units expected by the kernels are defined per column in COLUMN_UNITS (a column
+has the same meaning, and units, in every BLE). The units row of an input file
+(the line below the header) is compared with these and the known conversions in
+UNIT_CONVERSIONS are applied, e.g. a wall yield strength given in MPa is converted
+to ksi. Every conversion applied is reported, so that e.g. a standoff labelled (mm)
+but entered in cm does not silently change the results by a factor of 10.
+'''
+
+BLE = namedtuple('BLE', ['module', 'kernel', 'columns', 'column', 'label', 'test_data', 'test_ranges', 'test_types', 'type_columns'],
+                 defaults=['dc_BLE', 'BLE', None, None, None, None])
+BLE.__doc__ = '''
+Registry entry of a BLE:
+    module, kernel: module (in BLEs/) and name of the vectorised performance function
+        (<row function>_vec, the array form of the row function)
+    columns: input columns required by the kernel
+    column, label: name of the output column and label of the ballistic limit curve
+    test_data: experimental database (in data/) for the test-data overlay, if any
+    test_ranges: database column -> input column(s) (summed) matched within the tolerance
+    test_types: values of 'type' for which the database applies (default all)
+    type_columns: value of 'type' -> additional input columns required by that type
+'''
+
+## units expected by the kernels ('-' for strings and dimensionless values)
+COLUMN_UNITS = {
+    'proj_mat': '-', 'proj_density': 'g/cm3', 'angle': 'deg', 'type': '-', 'mode': '-',
+    'bumper_mat': '-', 'bumper_thick': 'cm', 'bumper_density': 'g/cm3', 'bumper_AD': 'g/cm2',
+    'outerBumper_mat': '-', 'outerBumper_thick': 'cm', 'outerBumper_density': 'g/cm3',
+    'innerBumper_mat': '-', 'innerBumper_thick': 'cm', 'innerBumper_density': 'g/cm3',
+    'standoff': 'cm', 'standoff1': 'cm', 'standoff2': 'cm',
+    'wall_mat': '-', 'wall_thick': 'cm', 'wall_density': 'g/cm3', 'wall_yield': 'ksi', 'wall_AD': 'g/cm2',
+    'target_mat': '-', 'shield_thick': 'cm', 'shield_density': 'g/cm3', 'shield_HB': 'HB', 'shield_C': 'km/s',
+    'AD_MLI': 'g/cm2', 'S_MLI': 'cm', 'MLI_AD': 'g/cm2', 'thickness': 'cm', 'max_damage': 'cm',
+    'mesh_AD': 'g/cm2', 'kevlar_AD': 'g/cm2', 'nextel_AD': 'g/cm2',
+    'SP_mass': 'g', 'SP_AD': 'g/cm2', 'foam_density': 'g/cm3', 'foam_AD': 'g/cm2',
+}
+
+## (given units, expected units) -> multiplier
+UNIT_CONVERSIONS = {
+    ('MPa', 'ksi'): 0.145038,
+    ('mm', 'cm'): 0.1,
+}
+
+## alternative spellings used in the units rows of the input files
+UNIT_ALIASES = {'g/ccm': 'g/cm3', '': '-'}
+
+## test-data matching used for the double-wall databases
+DOUBLE_WALL_RANGES = {'bumper_thick': ('bumper_thick',), 'standoff': ('standoff',), 'wall_thick': ('wall_thick',)}
+
+WHIPPLE_COLUMNS = ('proj_density', 'angle', 'bumper_thick', 'bumper_density', 'standoff', 'wall_thick', 'wall_yield', 'AD_MLI', 'S_MLI')
+
+REGISTRY = {
+    'JSCwhipple': BLE('BLE_JSCwhipple', 'JSCwhipple_performance_vec', WHIPPLE_COLUMNS,
+                      'dc_BLE-JSCwhipple', 'BLE-JSCwhipple', 'database_whipple_pyBLOSSUM.csv', DOUBLE_WALL_RANGES),
+    'JSCwhipple_mod': BLE('BLE_JSCwhipple_mod', 'modJSCwhipple_performance_vec', WHIPPLE_COLUMNS,
+                          'dc_BLE-JSCwhipple_mod', 'BLE-JSCwhipple_mod', 'database_whipple_pyBLOSSUM.csv', DOUBLE_WALL_RANGES),
+    'NNOwhipple': BLE('BLE_NNOwhipple', 'NNO_performance_vec', WHIPPLE_COLUMNS,
+                      'dc_BLE-NNOwhipple', 'BLE-NNOwhipple', 'database_whipple_pyBLOSSUM.csv', DOUBLE_WALL_RANGES),
+    'modNNOwhipple': BLE('BLE_modNNOwhipple', 'modNNO_performance_vec', WHIPPLE_COLUMNS+('wall_density',),
+                         'dc_BLE-modNNOwhipple', 'BLE-modNNOwhipple', 'database_whipple_pyBLOSSUM.csv', DOUBLE_WALL_RANGES),
+    'reimerdeswhipple': BLE('BLE_reimerdeswhipple', 'reimerdes_performance_vec', WHIPPLE_COLUMNS,
+                            'dc_BLE-reimerdesWhipple', 'BLE-reimerdesWhipple', 'database_whipple_pyBLOSSUM.csv', DOUBLE_WALL_RANGES),
+    'SRL': BLE('BLE_SRL', 'SRL_performance_vec', ('type', 'proj_density', 'angle', 'wall_thick', 'wall_yield', 'AD_MLI'),
+               'dc_BLE', 'BLE-SRL', 'database_HCSP_pyBLOSSUM.csv', DOUBLE_WALL_RANGES, test_types=('double',),
+               type_columns={'double': ('bumper_mat', 'bumper_thick', 'bumper_density', 'standoff', 'wall_density'),
+                             'triple': ('outerBumper_mat', 'outerBumper_thick', 'outerBumper_density', 'standoff1',
+                                        'innerBumper_mat', 'innerBumper_thick', 'innerBumper_density', 'standoff2')}),
+    'foamSP': BLE('BLE_foamSP', 'foamSP_performance_vec',
+                  ('proj_density', 'angle', 'bumper_thick', 'bumper_density', 'standoff', 'wall_thick', 'wall_density', 'wall_yield', 'AD_MLI'),
+                  test_data='database_foamSP_pyBLOSSUM.csv', test_ranges=DOUBLE_WALL_RANGES),
+    'stuffedWhipple': BLE('BLE_stuffedWhipple', 'stuffedWhipple_performance_vec',
+                          ('proj_density', 'angle', 'bumper_thick', 'bumper_density', 'kevlar_AD', 'nextel_AD', 'standoff',
+                           'wall_thick', 'wall_density', 'wall_yield', 'AD_MLI'),
+                          test_data='database_stuffedWhipple_pyBLOSSUM.csv',
+                          test_ranges=dict(DOUBLE_WALL_RANGES, stuffing_AD=('kevlar_AD', 'nextel_AD'))),
+    'meshDB': BLE('BLE_meshDB', 'meshDB_performance_vec',
+                  ('proj_density', 'angle', 'mesh_AD', 'bumper_thick', 'bumper_density', 'kevlar_AD', 'standoff',
+                   'wall_thick', 'wall_density', 'wall_yield')),
+    'multishock': BLE('BLE_multishock', 'multishock_performance_vec',
+                      ('type', 'proj_density', 'angle', 'bumper_AD', 'standoff', 'wall_thick', 'wall_density', 'wall_AD', 'wall_yield')),
+    'MLI': BLE('BLE_MLI', 'mli_performance_vec',
+               ('type', 'proj_density', 'angle', 'bumper_AD', 'wall_thick', 'wall_AD', 'MLI_AD', 'thickness')),
+    'singleWall': BLE('BLE_singleWall', 'singleWall_performance_vec',
+                      ('type', 'mode', 'proj_density', 'angle', 'shield_thick', 'shield_density', 'shield_HB', 'shield_C', 'MLI_AD')),
+    'transparent': BLE('BLE_transparent', 'transparent_performance_vec',
+                       ('type', 'mode', 'proj_density', 'angle', 'thickness', 'max_damage')),
+}
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def get_ble(name):
+    '''
+    Function to return the registry entry of a BLE
+    '''
+    if name not in REGISTRY:
+        raise KeyError(f"unknown BLE '{name}' (available: {', '.join(REGISTRY)})")
+    return REGISTRY[name]
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def load_kernel(name, vectorized=True):
+    '''
+    Function to import the module of a BLE and return its vectorised performance function
+    (or, if vectorized is False, the row function it is the array form of)
+    '''
+    ble = get_ble(name)
+    kernel = ble.kernel if vectorized else ble.kernel[:-len('_vec')]
+    return getattr(importlib.import_module(ble.module), kernel)
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def required_columns(name, df_data):
+    '''
+    Function to return the input columns a BLE requires for the configurations in
+    df_data (including the columns of the configuration types present)
+    '''
+    ble = get_ble(name)
+    columns = list(ble.columns)
+    if ble.type_columns is not None and 'type' in df_data:
+        for config_type in pd.unique(df_data['type']):
+            columns += [col for col in ble.type_columns.get(config_type, ()) if col not in columns]
+    return columns
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def check_columns(name, df_data):
+    '''
+    Function to raise a ValueError if df_data lacks any column required by a BLE
+    '''
+    missing = [col for col in required_columns(name, df_data) if col not in df_data]
+    if missing:
+        raise ValueError(f"input columns required by {name} are missing: {', '.join(missing)}")
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def normalise_unit(unit):
+    '''
+    Function to give a unit from an input file its canonical spelling, e.g. '(g/ccm)' -> 'g/cm3'
+    '''
+    if unit is None or (isinstance(unit, float) and np.isnan(unit)):
+        unit = ''
+    unit = str(unit).strip().strip('()').strip()
+    return UNIT_ALIASES.get(unit, unit)
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def convert_units(df_data, units):
+    '''
+    Function to convert the columns of df_data from the units given in the input file
+    ('units': column -> unit, as read from its units row) to the units expected by the
+    kernels. Returns (converted copy of df_data, list of notes on the conversions applied
+    and on the units that could not be converted, for which the values are used as given)
+    '''
+    df_data = df_data.copy()
+    notes = []
+    for col, expected in COLUMN_UNITS.items():
+        if col not in df_data or col not in units:
+            continue
+        given = normalise_unit(units[col])
+        if given == expected or given == '-' or expected == '-':
+            continue
+        if (given, expected) in UNIT_CONVERSIONS:
+            df_data[col] = pd.to_numeric(df_data[col], errors='coerce')*UNIT_CONVERSIONS[(given, expected)]
+            notes.append(f"{col} converted from {given} to {expected}")
+        else:
+            notes.append(f"{col} is given in {given} but expected in {expected}; values are used as given")
+    return df_data, notes
@@ -0,0 +1,202 @@
+import numpy as np
+from collections import namedtuple
+
+'''
+Vectorised root finders for the implicit equations in the BLEs (e.g. the F2* de-rated
+hypervelocity diameter of the JSC Whipple equation). Each function solves a whole
+array of independent problems at once: 'func' must accept an array of trial values
+(one per problem) and return the array of residuals.
+
+Convergence criterion used throughout: a problem is converged when its bracket has
+shrunk to |b - a| <= xtol + rtol*|x| AND the residual satisfies |f(x)| <= ftol*|x|.
+The residual test rejects brackets that have collapsed onto a discontinuity of 'func'
+(e.g. the step change in tb/dp,crit at S/dp = 30) rather than onto a true root.
+'''
+
+RootResult = namedtuple('RootResult', ['root', 'converged', 'iterations'])
+
+## default tolerances
+XTOL = 1e-12
+RTOL = 1e-10
+FTOL = 1e-8
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def bracket_root(func, x0, factor=2.0, maxexpand=60):
+    '''
+    Find a sign-change bracket for each problem by geometric search from the start
+    point x0 (> 0). 'func' is assumed to be increasing through the root, as for
+    residuals of the form x - F(x): where f(x0) > 0 the search moves down by 'factor',
+    otherwise it moves up. Returns (a, fa, b, fb, found, evaluations)
+    '''
+
+    x0 = np.asarray(x0, dtype=float)
+    f0 = np.asarray(func(x0), dtype=float)
+
+    a, fa = x0.copy(), f0.copy()
+    b, fb = x0.copy(), f0.copy()
+    found = (f0 == 0)
+    searching = np.isfinite(f0) & ~found
+    step = np.where(f0 > 0, 1/factor, factor)
+    evaluations = np.ones(x0.shape, dtype=int)
+
+    for _ in range(maxexpand):
+        if not searching.any():
+            break
+        x = np.where(searching, b*step, b)
+        fx = np.asarray(func(x), dtype=float)
+        evaluations += searching
+
+        ## stop expanding problems whose residual becomes undefined
+        lost = searching & ~np.isfinite(fx)
+        searching &= ~lost
+
+        ## a sign change closes the bracket [a, b]
+        closed = searching & (np.sign(fx) != np.sign(f0))
+        a = np.where(searching, b, a)
+        fa = np.where(searching, fb, fa)
+        b = np.where(searching, x, b)
+        fb = np.where(searching, fx, fb)
+        found |= closed
+        searching &= ~closed
+
+    return a, fa, b, fb, found, evaluations
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def solve_bracketed(func, a, b, fa=None, fb=None, xtol=XTOL, rtol=RTOL, ftol=FTOL, maxiter=100):
+    '''
+    Illinois (modified regula falsi) iteration on the brackets [a, b], falling back to
+    bisection whenever the secant step is undefined. Problems without a sign change
+    are returned unconverged at the endpoint with the smaller residual
+    '''
+
+    a = np.array(a, dtype=float)
+    b = np.array(b, dtype=float)
+    fa = np.asarray(func(a) if fa is None else fa, dtype=float).copy()
+    fb = np.asarray(func(b) if fb is None else fb, dtype=float).copy()
+    iterations = np.zeros(a.shape, dtype=int)
+
+    def done(a, b, fa, fb):
+        x = np.where(np.abs(fb) <= np.abs(fa), b, a)
+        return (fa == 0) | (fb == 0) | (np.abs(b-a) <= xtol+rtol*np.abs(x))
+
+    active = (np.sign(fa) != np.sign(fb)) & np.isfinite(fa) & np.isfinite(fb) & ~done(a, b, fa, fb)
+
+    for _ in range(maxiter):
+        if not active.any():
+            break
+
+        ## secant step through the bracket ends, bisection if it is undefined or outside
+        with np.errstate(divide='ignore', invalid='ignore'):
+            c = b-fb*(b-a)/(fb-fa)
+        outside = ~np.isfinite(c) | (c <= np.minimum(a, b)) | (c >= np.maximum(a, b))
+        c = np.where(outside, 0.5*(a+b), c)
+        c = np.where(active, c, b)
+        fc = np.asarray(func(c), dtype=float)
+        iterations += active
+
+        ## keep the sign change; halve the retained end's residual (Illinois) otherwise
+        flip = active & (np.sign(fc) != np.sign(fb))
+        a_new = np.where(flip, b, a)
+        fa_new = np.where(flip, fb, np.where(active, 0.5*fa, fa))
+        b = np.where(active, c, b)
+        fb = np.where(active, fc, fb)
+        a, fa = a_new, fa_new
+
+        active &= np.isfinite(fb) & ~done(a, b, fa, fb)
+
+    ## report the end with the smaller residual
+    use_b = ~(np.abs(fa) < np.abs(fb))
+    x = np.where(use_b, b, a)
+    fx = np.where(use_b, fb, fa)
+    converged = done(a, b, fa, fb) & (np.abs(fx) <= ftol*np.abs(x))
+
+    return RootResult(x, converged, iterations)
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def find_root(func, x0, factor=2.0, xtol=XTOL, rtol=RTOL, ftol=FTOL, maxiter=100):
+    '''
+    Bracket each root by geometric search from x0 and then refine it with
+    solve_bracketed. The iteration count includes the bracketing evaluations
+    '''
+
+    a, fa, b, fb, found, evaluations = bracket_root(func, x0, factor=factor)
+    result = solve_bracketed(func, a, b, fa=fa, fb=fb, xtol=xtol, rtol=rtol, ftol=ftol, maxiter=maxiter)
+
+    return RootResult(result.root, result.converged & found, result.iterations+evaluations)
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def solve_unique(solver, *args):
+    '''
+    Call solver(*args) once per unique combination of the (broadcast) arguments and
+    scatter the result(s) back to the broadcast shape. Used for the velocity-independent
+    solves of the BLEs, whose inputs repeat across the velocities of a configuration
+    (and across identical configurations)
+    '''
+
+    args = np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in args])
+    unique, inverse = np.unique(np.stack([x.ravel() for x in args], axis=-1), axis=0, return_inverse=True)
+    inverse = inverse.reshape(args[0].shape)
+    result = solver(*unique.T)
+
+    if isinstance(result, tuple):
+        return tuple(np.asarray(r)[inverse] for r in result)
+    return np.asarray(result)[inverse]
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def find_root_sweep(func, x0, active=None, factor=1.001, xtol=XTOL, rtol=RTOL, ftol=FTOL, maxiter=100):
+    '''
+    Continuation form of find_root for an (n, m) grid of problems swept along its last
+    axis (e.g. the velocities of n ballistic limit curves). func(x, index) returns the
+    residuals of the problems at 'index' (a (rows, columns) pair of index arrays) for the
+    trial values x. Column j is solved for all rows at once, seeded from the converged
+    roots of the previous columns and bracketed with the small geometric 'factor'; problems
+    without a converged neighbour start from x0, and warm-started problems that fail to
+    converge are re-solved from x0. Only the 'active' problems are solved (default all).
+    Returns a RootResult with the iteration count of every problem (including any
+    fallback solve); inactive problems are returned as NaN with zero iterations
+    '''
+
+    x0 = np.asarray(x0, dtype=float)
+    m = x0.shape[1]
+    active = np.ones(x0.shape, dtype=bool) if active is None else np.broadcast_to(active, x0.shape)
+
+    root = np.full(x0.shape, np.nan)
+    converged = np.zeros(x0.shape, dtype=bool)
+    iterations = np.zeros(x0.shape, dtype=int)
+
+    for j in range(m):
+        rows = np.flatnonzero(active[:, j])
+        if len(rows) == 0:
+            continue
+        cols = np.full(len(rows), j)
+
+        ## warm start where the previous column converged: its root-to-x0 ratio varies
+        ## slowly along the sweep and is extrapolated linearly from the two previous columns
+        warm = converged[rows, j-1] if j > 0 else np.zeros(len(rows), dtype=bool)
+        start = x0[rows, j].copy()
+        if warm.any():
+            ratio = root[rows, j-1]/x0[rows, j-1]
+            if j > 1:
+                ratio = np.where(converged[rows, j-2], 2*ratio-root[rows, j-2]/x0[rows, j-2], ratio)
+            start = np.where(warm, x0[rows, j]*ratio, start)
+        result = find_root(lambda x: func(x, (rows, cols)), start, factor=np.where(warm, factor, 2.0),
+                           xtol=xtol, rtol=rtol, ftol=ftol, maxiter=maxiter)
+        x, ok, its = result.root.copy(), result.converged.copy(), result.iterations.copy()
+
+        ## fall back to the cold start where the warm start failed
+        retry = warm & ~ok
+        if retry.any():
+            sub = rows[retry]
+            cold = find_root(lambda x: func(x, (sub, cols[retry])), x0[sub, j],
+                             xtol=xtol, rtol=rtol, ftol=ftol, maxiter=maxiter)
+            x[retry], ok[retry] = cold.root, cold.converged
+            its[retry] += cold.iterations
+
+        root[rows, j], converged[rows, j], iterations[rows, j] = x, ok, its
+
+    return RootResult(root, converged, iterations)
@@ -0,0 +1,155 @@
+import numpy as np
+import json
+from configs import ConfigSet, evaluate_curves
+from curve_cache import normalise_value
+from registry import COLUMN_UNITS, load_kernel, required_columns, check_columns
+
+'''
+Parametric sweeps of a BLE over the Cartesian product of any of its numeric input
+columns and the velocity, e.g. bumper_thick x standoff x wall_thick x angle x velocity.
+The columns that are not swept are taken from a base configuration (e.g. the first row
+of an input file). The grid of configurations is evaluated as one ConfigSet: the swept
+columns hold one value per grid point, while the base values are stored once as
+broadcast views and the velocity axis is broadcast against the grid (see
+configs.evaluate_curves). The result is a labelled N-D array: dims (the swept columns in
+the given order, then 'velocity'), one coordinate vector per dim, and the critical
+diameters and the flags of the converged points with one axis per dim. Sweeps are saved
+to compressed .npz files (values, converged, dims, coord_<dim> and the sweep attributes
+as JSON) instead of a long-format CSV that repeats every configuration column for every
+point.
+'''
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+class SweepResult:
+    '''
+    Critical diameters of a sweep ('values', one axis per dim) with the dim names and
+    their coordinate vectors. 'converged' flags the points whose solve converged (all
+    True if not given, e.g. for BLEs without an iterative solve). 'attrs' holds the BLE
+    name and the base configuration
+    '''
+
+    def __init__(self, dims, coords, values, attrs=None, converged=None):
+        self.dims = tuple(dims)
+        self.coords = {dim: np.asarray(coords[dim]) for dim in self.dims}
+        self.values = np.asarray(values, dtype=float)
+        self.converged = np.ones(self.values.shape, dtype=bool) if converged is None else np.asarray(converged, dtype=bool)
+        self.attrs = dict(attrs or {})
+        if self.values.shape != tuple(len(self.coords[dim]) for dim in self.dims):
+            raise ValueError(f"values of shape {self.values.shape} do not match the coordinates of {self.dims}")
+        if self.converged.shape != self.values.shape:
+            raise ValueError(f"converged of shape {self.converged.shape} does not match the values of shape {self.values.shape}")
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def sel(self, **indexers):
+        '''
+        Returns the sub-sweep at the coordinates closest to the given values, e.g.
+        sel(standoff=10.0, angle=0), dropping the selected dims
+        '''
+        unknown = set(indexers)-set(self.dims)
+        if unknown:
+            raise KeyError(f"not a dim of the sweep: {', '.join(sorted(unknown))}")
+        index = []
+        dims = []
+        for dim in self.dims:
+            if dim in indexers:
+                index.append(int(np.argmin(np.abs(self.coords[dim]-indexers[dim]))))
+            else:
+                index.append(slice(None))
+                dims.append(dim)
+        return SweepResult(dims, self.coords, self.values[tuple(index)], self.attrs, self.converged[tuple(index)])
+
+    def to_frame(self):
+        '''
+        Long-format DataFrame with one column per dim, the critical diameter 'dc' and
+        'converged' (for small sweeps or selections)
+        '''
+        import pandas as pd
+
+        grids = np.meshgrid(*[self.coords[dim] for dim in self.dims], indexing='ij')
+        data = {dim: grid.ravel() for dim, grid in zip(self.dims, grids)}
+        data['dc'] = self.values.ravel()
+        data['converged'] = self.converged.ravel()
+        return pd.DataFrame(data)
+
+    def save(self, path):
+        '''
+        Saves the sweep to a compressed .npz file (see load_sweep)
+        '''
+        arrays = {f"coord_{dim}": coord for dim, coord in self.coords.items()}
+        np.savez_compressed(path, values=self.values, converged=self.converged, dims=np.asarray(self.dims, dtype=str),
+                            attrs=np.asarray(json.dumps(self.attrs)), **arrays)
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def load_sweep(path):
+    '''
+    Function to load a sweep saved with SweepResult.save
+    '''
+    with np.load(path) as file:
+        dims = [str(dim) for dim in file['dims']]
+        return SweepResult(dims, {dim: file[f"coord_{dim}"] for dim in dims}, file['values'],
+                           json.loads(str(file['attrs'])), file['converged'] if 'converged' in file else None)
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def parse_axis(spec):
+    '''
+    Function to parse the values of a sweep axis given as 'start:stop:num' (num values
+    from start to stop inclusive) or as a comma-separated list, e.g. '0.1:0.3:5' or '0,30,45,60'
+    '''
+    if ':' in spec:
+        start, stop, num = spec.split(':')
+        return np.linspace(float(start), float(stop), int(num))
+    return np.array([float(value) for value in spec.split(',')])
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def sweep(name, base, axes, velocities=None, vectorized=True, workers=None, chunksize=None):
+    '''
+    Function to evaluate the BLE 'name' over the Cartesian product of 'axes' (input
+    column -> values, in the units of COLUMN_UNITS; a 'velocity' entry replaces the
+    default velocity vector), with the other input columns taken from the base
+    configuration 'base' (a dict, or a DataFrame/Series of which the first row is used).
+    Returns a SweepResult with dims (*axes, 'velocity'), including the convergence flags
+    of the points. 'vectorized', 'workers' and 'chunksize' are passed on to
+    configs.evaluate_curves
+    '''
+    import pandas as pd
+
+    if isinstance(base, pd.DataFrame):
+        base = base.iloc[0]
+    base = dict(base)
+    axes = dict(axes)
+    velocities = np.asarray(axes.pop('velocity', np.linspace(0.1,15,150) if velocities is None else velocities), dtype=float)
+
+    ## only the numeric inputs of the BLE can be swept
+    columns = required_columns(name, pd.DataFrame([base]))
+    for col in axes:
+        if col not in columns or COLUMN_UNITS.get(col, '-') == '-':
+            raise ValueError(f"{col} is not a numeric input column of {name} (sweepable: "
+                             f"{', '.join(c for c in columns if COLUMN_UNITS.get(c, '-') != '-')}, velocity)")
+    coords = {col: np.asarray(values, dtype=float).ravel() for col, values in axes.items()}
+    for col, coord in coords.items():
+        if len(coord) == 0:
+            raise ValueError(f"no values given for the sweep of {col}")
+    check_columns(name, pd.DataFrame([dict(base, **{col: coord[0] for col, coord in coords.items()})]))
+
+    ## one configuration per grid point (the last axis varying fastest), so that the
+    ## curves reshape directly to the grid; the base values are shared by every point
+    shape = tuple(len(coord) for coord in coords.values())
+    n = int(np.prod(shape))
+    columns = {col: value for col, value in base.items() if col not in coords and col != 'velocity'}
+    for col, grid in zip(coords, np.meshgrid(*coords.values(), indexing='ij', copy=False)):
+        columns[col] = grid.ravel()
+    config_set = ConfigSet.from_columns(columns, n, velocities)
+
+    dc, converged = evaluate_curves(config_set, load_kernel(name, vectorized=vectorized), velocities, vectorized=vectorized,
+                                    workers=workers, chunksize=chunksize, return_converged=True)
+
+    coords['velocity'] = velocities
+    attrs = {'ble': name, 'base': {str(col): normalise_value(value) for col, value in base.items() if col not in coords}}
+    return SweepResult(list(coords), coords, dc.reshape(shape+(len(velocities),)), attrs, converged.reshape(shape+(len(velocities),)))
@@ -0,0 +1,313 @@
+import numpy as np
+import pandas as pd
+import os
+import json
+import shutil
+import hashlib
+
+'''
+Loader and query engine for the experimental impact databases (data/database_*_pyBLOSSUM.csv). On the
+first load each database is parsed once (skipping the units row) and converted to a
+typed columnar binary cache in cache/test_data/<database>/: one .npy file per column
+(numbers as int64/float64, strings as fixed-width unicode with a separate missing-value
+mask) plus meta.json describing the columns and the source CSV. Later loads
+memory-map the .npy files instead of re-parsing the CSV.
+
+The cache is invalidated when the CSV changes: a matching size and modification time
+is accepted directly; otherwise the SHA-256 hash of the CSV is compared with the one
+recorded in meta.json (so that e.g. a fresh checkout, which resets mtimes, does not
+force a rebuild) and the cache is rebuilt if it differs.
+
+TestDataMatcher answers the test-data overlay queries (materials matched on their first
+nine characters, geometry within a relative tolerance, exact angle) from sorted
+indexes built once per database, instead of scanning a boolean mask over every shot.
+'''
+
+## bump whenever the on-disk layout changes
+CACHE_VERSION = 1
+
+## databases already opened in this process, keyed by CSV path
+_databases = {}
+
+## number of leading characters that identify a material family, so that e.g.
+## AA6061-T651 and AA6061-T6 are handled as common materials
+MATERIAL_PREFIX = 9
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def file_hash(path):
+    '''
+    Function to calculate the SHA-256 hash of a file
+    '''
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024**2), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+class TestDatabase:
+    '''
+    Columns of an experimental database as (memory-mapped) numpy arrays. Missing string
+    values are stored as '' and flagged in 'missing'
+    '''
+
+    def __init__(self, columns, strings, missing, n_rows):
+        self.columns = columns
+        self.strings = strings
+        self.missing = missing
+        self.n_rows = n_rows
+
+    def __len__(self):
+        return self.n_rows
+
+    def __getitem__(self, col):
+        return self.columns[col]
+
+    def __contains__(self, col):
+        return col in self.columns
+
+    def keys(self):
+        return list(self.columns)
+
+    def matcher(self):
+        '''
+        Returns the (lazily created) TestDataMatcher of this database
+        '''
+        if not hasattr(self, '_matcher'):
+            self._matcher = TestDataMatcher(self)
+        return self._matcher
+
+    def to_frame(self):
+        '''
+        Returns the database as a DataFrame, as read by pd.read_csv(..., skiprows=[1])
+        '''
+        data = {}
+        for col, values in self.columns.items():
+            if col in self.missing:
+                data[col] = pd.Series(values, dtype=str).mask(self.missing[col])
+            elif col in self.strings:
+                data[col] = pd.Series(values, dtype=str)
+            else:
+                data[col] = values
+        return pd.DataFrame(data)
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+class TestDataMatcher:
+    '''
+    Range-indexed queries over a TestDatabase. Every queried column gets a sorted index
+    (argsort order and sorted values), built on first use; material columns are indexed
+    on integer family codes (first MATERIAL_PREFIX characters). Each condition of a
+    query is resolved to a contiguous slice of its index by binary search, the most
+    selective slice supplies the candidate shots and the remaining conditions are only
+    checked on those candidates
+    '''
+
+    def __init__(self, database):
+        self.database = database
+        self.indexes = {}
+        self.families = {}
+        self._frame = None
+
+    def family_codes(self, col):
+        '''
+        Returns (codes, lookup): the material family code of every shot (-1 if missing)
+        and the mapping from family name to code
+        '''
+        if col not in self.families:
+            values = np.asarray(self.database[col]).astype(f"U{MATERIAL_PREFIX}")
+            codes, families = pd.factorize(values)
+            missing = values == ''
+            if col in getattr(self.database, 'missing', {}):
+                missing |= self.database.missing[col]
+            codes = np.where(missing, -1, codes)
+            self.families[col] = (codes, {family: code for code, family in enumerate(families)})
+        return self.families[col]
+
+    def index(self, col, material=False):
+        '''
+        Returns (order, sorted_values, values) for a column, building the index if needed
+        '''
+        key = (col, material)
+        if key not in self.indexes:
+            if material:
+                values = self.family_codes(col)[0]
+            else:
+                values = np.asarray(self.database[col], dtype=float)
+            order = np.argsort(values, kind='stable')
+            self.indexes[key] = (order, values[order], values)
+        return self.indexes[key]
+
+    def query(self, materials=None, ranges=None, equal=None, tolerance=0.05):
+        '''
+        Returns the sorted indices of the shots whose
+            - material columns share the family (first MATERIAL_PREFIX characters) of the
+              given materials,
+            - range columns lie within [1-tolerance, 1+tolerance] times the given values,
+            - equal columns match the given values exactly
+        e.g. query(materials={'wall_mat': 'AA6061-T6'}, ranges={'wall_thick': 0.2}, equal={'angle': 0})
+        '''
+        conditions = []
+        for col, material in (materials or {}).items():
+            code = self.family_codes(col)[1].get(str(material)[:MATERIAL_PREFIX], None)
+            if code is None:
+                return np.array([], dtype=int)
+            conditions.append((col, True, code, code))
+        for col, value in (ranges or {}).items():
+            bounds = ((1-tolerance)*value, (1+tolerance)*value)
+            conditions.append((col, False, min(bounds), max(bounds)))
+        for col, value in (equal or {}).items():
+            conditions.append((col, False, value, value))
+        if not conditions:
+            return np.arange(len(self.database))
+
+        ## locate every condition in its sorted index and start from the most selective one
+        slices = []
+        for col, material, lower, upper in conditions:
+            order, sorted_values, values = self.index(col, material)
+            start = np.searchsorted(sorted_values, lower, side='left')
+            stop = np.searchsorted(sorted_values, upper, side='right')
+            slices.append((stop-start, order[start:stop], values, lower, upper))
+        slices.sort(key=lambda item: item[0])
+
+        rows = slices[0][1]
+        for _, _, values, lower, upper in slices[1:]:
+            if len(rows) == 0:
+                break
+            candidate = values[rows]
+            rows = rows[(candidate >= lower) & (candidate <= upper)]
+
+        return np.sort(rows)
+
+    def match(self, materials=None, ranges=None, equal=None, tolerance=0.05):
+        '''
+        Returns the matching shots (see query) as a DataFrame
+        '''
+        if self._frame is None:
+            self._frame = self.database.to_frame()
+        return self._frame.iloc[self.query(materials, ranges, equal, tolerance)]
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def build_cache(csv_path, cache_path, signature):
+    '''
+    Function to parse a database CSV and write its binary cache to 'cache_path'
+    '''
+    df = pd.read_csv(csv_path, skiprows=[1])
+
+    ## write into a temporary directory and move it into place once complete
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        entry = {'name': col, 'file': f"col_{i:03d}.npy"}
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            np.save(os.path.join(tmp_path, entry['file']), values.to_numpy())
+        else:
+            missing = values.isna().to_numpy()
+            np.save(os.path.join(tmp_path, entry['file']), np.asarray(values.where(~missing, '').astype(str), dtype=str))
+            entry['kind'] = 'str'
+            if missing.any():
+                entry['missing'] = f"col_{i:03d}_missing.npy"
+                np.save(os.path.join(tmp_path, entry['missing']), missing)
+        columns.append(entry)
+
+    meta = {'version': CACHE_VERSION, 'source': signature, 'n_rows': len(df), 'columns': columns}
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as file:
+        json.dump(meta, file, indent=1)
+
+    if os.path.exists(cache_path):
+        shutil.rmtree(cache_path)
+    os.replace(tmp_path, cache_path)
+
+    return meta
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def valid_meta(csv_path, cache_path, stat):
+    '''
+    Function to return the cache metadata if the cache in 'cache_path' is up to date
+    with the CSV, otherwise None
+    '''
+    try:
+        with open(os.path.join(cache_path, 'meta.json')) as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != CACHE_VERSION:
+        return None
+
+    source = meta['source']
+    if source['size'] != stat.st_size:
+        return None
+    if source['mtime_ns'] == stat.st_mtime_ns:
+        return meta
+
+    ## same size but touched: compare the content hash and record the new mtime
+    if source['sha256'] != file_hash(csv_path):
+        return None
+    meta['source']['mtime_ns'] = stat.st_mtime_ns
+    with open(os.path.join(cache_path, 'meta.json'), 'w') as file:
+        json.dump(meta, file, indent=1)
+    return meta
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def load_test_database(filename, root_dir):
+    '''
+    Function to load data/<filename> from root_dir through the binary cache in
+    cache/test_data, (re)building the cache if needed. Returns a TestDatabase
+    '''
+    csv_path = os.path.join(root_dir, 'data', filename)
+    cache_path = os.path.join(root_dir, 'cache', 'test_data', os.path.splitext(filename)[0])
+    stat = os.stat(csv_path)
+
+    ## reuse the database if it was already opened in this process and is unchanged
+    key = os.path.abspath(csv_path)
+    if key in _databases and _databases[key][0] == (stat.st_size, stat.st_mtime_ns):
+        return _databases[key][1]
+
+    meta = valid_meta(csv_path, cache_path, stat)
+    if meta is None:
+        if not os.path.exists(os.path.dirname(cache_path)):
+            os.makedirs(os.path.dirname(cache_path))
+        signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_hash(csv_path)}
+        meta = build_cache(csv_path, cache_path, signature)
+
+    columns = {}
+    strings = set()
+    missing = {}
+    for entry in meta['columns']:
+        columns[entry['name']] = np.load(os.path.join(cache_path, entry['file']), mmap_mode='r')
+        if entry.get('kind') == 'str':
+            strings.add(entry['name'])
+        if 'missing' in entry:
+            missing[entry['name']] = np.load(os.path.join(cache_path, entry['missing']))
+    database = TestDatabase(columns, strings, missing, meta['n_rows'])
+
+    _databases[key] = ((stat.st_size, stat.st_mtime_ns), database)
+    return database
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def load_test_data(filename, root_dir):
+    '''
+    Function to load data/<filename> as a DataFrame (drop-in replacement for
+    pd.read_csv(os.path.join(root_dir,'data',filename),skiprows=[1]))
+    '''
+    return load_test_database(filename, root_dir).to_frame()
+
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def load_test_matcher(filename, root_dir):
+    '''
+    Function to return the TestDataMatcher of data/<filename> (shared by every caller
+    in the process, so its indexes are only built once)
+    '''
+    return load_test_database(filename, root_dir).matcher()
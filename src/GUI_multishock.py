@@ -62,7 +62,8 @@ class PackageLoader(QThread):
         color_line_style_pairs = list(zip(colors, line_styles))
 
         ## Load the ballistic limit scripts
-        from BLE_multishock import multishockHybrid_performance, multishockAl_performance, multishockKevlar_performance, multishockNextel_performance
+        from curve_cache import CurveCache
+        from BLE_multishock import multishockHybrid_performance, multishockAl_performance, multishockKevlar_performance, multishockNextel_performance, multishock_performance_vec
 
         ## Emit the loaded packages
         self.packages_loaded.emit({
@@ -76,10 +77,12 @@ class PackageLoader(QThread):
             'itertools': itertools,
             'pd': pd,
             'color_line_style_pairs': color_line_style_pairs,
+            'curve_cache': CurveCache(os.path.join(root_dir, "cache", "curves")),
             'multishockHybrid_performance': multishockHybrid_performance,
             'multishockAl_performance': multishockAl_performance,
             'multishockKevlar_performance': multishockKevlar_performance,
-            'multishockNextel_performance': multishockNextel_performance
+            'multishockNextel_performance': multishockNextel_performance,
+            'multishock_performance_vec': multishock_performance_vec
         })
 
 ## ------------------------------------------------- ##
@@ -107,6 +110,10 @@ class PlotWindow(QDialog):
         self.layout.addWidget(self.toolbar)
         self.layout.addWidget(self.canvas)
 
+        # Add a status line below the plot (e.g. whether the curves were served from the curve cache)
+        self.status_label = QLabel(self)
+        self.layout.addWidget(self.status_label)
+
         # Set the layout for the window
         self.setLayout(self.layout)
 
@@ -390,20 +397,18 @@ class MyApp(QWidget):
 
             # Call the ballistic limit equation
             velocities = self.packages['np'].linspace(0.1, 15, 150)  # units = km/s
-            df_plot = pd.DataFrame(self.packages['np'].repeat(df.values, len(velocities), axis=0), columns=df.columns)
-            df_plot['velocity'] = velocities
+            df_plot = pd.DataFrame({'velocity': velocities})
             pltmax = 0
-            df_config = df_plot.iloc[[0]].drop(columns=['velocity']) 
+            cache_status = []
+            df_config = df.iloc[[0]].copy()
             df_results = df_plot[['velocity']].copy()
             color, line_style = next(color_line_style_cycler)
-            if self.target_type_dropdown.currentText() == "Nextel rear wall":
-                df_plot['dc_BLE'] = df_plot.apply(self.packages['multishockNextel_performance'],axis=1)
-            elif self.target_type_dropdown.currentText() == "Kevlar rear wall":
-                df_plot['dc_BLE'] = df_plot.apply(self.packages['multishockKevlar_performance'],axis=1)
-            elif self.target_type_dropdown.currentText() == "Aluminium rear wall":
-                df_plot['dc_BLE'] = df_plot.apply(self.packages['multishockAl_performance'],axis=1)
-            elif self.target_type_dropdown.currentText() == "Hybrid shield":
-                df_plot['dc_BLE'] = df_plot.apply(self.packages['multishockHybrid_performance'],axis=1)
+            # Evaluate the selected shield type with the unified multi-shock equation
+            multishock_types = {"Nextel rear wall": 'nextel', "Kevlar rear wall": 'kevlar', "Aluminium rear wall": 'aluminium', "Hybrid shield": 'hybrid'}
+            df_type = df.assign(type=multishock_types.get(self.target_type_dropdown.currentText()))
+            dc, hits = self.packages['curve_cache'].evaluate(self.packages['multishock_performance_vec'], df_type, velocities, vectorized=True)
+            df_plot['dc_BLE'] = dc[0]
+            cache_status.append(f"dc_BLE (cache {'hit' if hits.all() else 'miss'})")
             ax.plot(df_plot['velocity'],df_plot['dc_BLE'],color=color,linestyle=line_style,label='BLE')
             pltmax = max(pltmax, df_plot['dc_BLE'][len(velocities)/2])
             df_results.insert(len(df_results.columns), 'dc_BLE', df_plot['dc_BLE'])
@@ -415,6 +420,7 @@ class MyApp(QWidget):
 
             # Draw the plot
             self.plot_window.canvas.draw()
+            self.plot_window.status_label.setText(f"Ballistic limit curves: {', '.join(cache_status)}")
 
             # Show the plot window
             self.plot_window.show()
@@ -62,8 +62,10 @@ class PackageLoader(QThread):
         color_line_style_pairs = list(zip(colors, line_styles))
 
         ## Load the ballistic limit scripts
-        from BLE_SRL import SRL_double_performance
-        from BLE_foamSP import foamSP_performance
+        from curve_cache import CurveCache
+        from test_data import load_test_matcher
+        from BLE_SRL import SRL_double_performance, SRL_double_performance_vec
+        from BLE_foamSP import foamSP_performance, foamSP_performance_vec
 
         ## Emit the loaded packages
         self.packages_loaded.emit({
@@ -77,8 +79,12 @@ class PackageLoader(QThread):
             'itertools': itertools,
             'pd': pd,
             'color_line_style_pairs': color_line_style_pairs,
+            'curve_cache': CurveCache(os.path.join(root_dir, "cache", "curves")),
+            'load_test_matcher': load_test_matcher,
             'SRL_double_performance': SRL_double_performance,
-            'foamSP_performance': foamSP_performance
+            'SRL_double_performance_vec': SRL_double_performance_vec,
+            'foamSP_performance': foamSP_performance,
+            'foamSP_performance_vec': foamSP_performance_vec
         })
 
 ## ------------------------------------------------- ##
@@ -106,6 +112,10 @@ class PlotWindow(QDialog):
         self.layout.addWidget(self.toolbar)
         self.layout.addWidget(self.canvas)
 
+        # Add a status line below the plot (e.g. whether the curves were served from the curve cache)
+        self.status_label = QLabel(self)
+        self.layout.addWidget(self.status_label)
+
         # Set the layout for the window
         self.setLayout(self.layout)
 
@@ -448,16 +458,20 @@ class MyApp(QWidget):
 
             # Call the ballistic limit equation
             velocities = self.packages['np'].linspace(0.1, 15, 150)  # units = km/s
-            df_plot = pd.DataFrame(self.packages['np'].repeat(df.values, len(velocities), axis=0), columns=df.columns)
-            df_plot['velocity'] = velocities
+            df_plot = pd.DataFrame({'velocity': velocities})
             pltmax = 0
-            df_config = df_plot.iloc[[0]].drop(columns=['velocity']) 
+            cache_status = []
+            df_config = df.iloc[[0]].copy()
             df_results = df_plot[['velocity']].copy()
             color, line_style = next(color_line_style_cycler)
             if self.core_type_dropdown.currentText() == "Honeycomb":
-                df_plot['dc_BLE'] = df_plot.apply(self.packages['SRL_double_performance'],axis=1)
+                dc, hits = self.packages['curve_cache'].evaluate(self.packages['SRL_double_performance_vec'], df, velocities, vectorized=True)
+                df_plot['dc_BLE'] = dc[0]
+                cache_status.append(f"dc_BLE (cache {'hit' if hits.all() else 'miss'})")
             elif self.core_type_dropdown.currentText() == "Foam":
-                df_plot['dc_BLE'] = df_plot.apply(self.packages['foamSP_performance'],axis=1)
+                dc, hits = self.packages['curve_cache'].evaluate(self.packages['foamSP_performance_vec'], df, velocities, vectorized=True)
+                df_plot['dc_BLE'] = dc[0]
+                cache_status.append(f"dc_BLE (cache {'hit' if hits.all() else 'miss'})")
             ax.plot(df_plot['velocity'],df_plot['dc_BLE'],color=color,linestyle=line_style,label='BLE')
             pltmax = max(pltmax, df_plot['dc_BLE'][len(velocities)/2])
             df_results.insert(len(df_results.columns), 'dc_BLE', df_plot['dc_BLE'])
@@ -469,21 +483,15 @@ class MyApp(QWidget):
                     filename = 'database_HCSP_pyBLOSSUM.csv'
                 elif self.core_type_dropdown.currentText() == "Foam":
                     filename = 'database_foamSP_pyBLOSSUM.csv'                
-                df_test = pd.read_csv(os.path.join(root_dir,'data',filename),skiprows=[1])
-                
-                # Filter the test data based on the selected values
-                lower_bound = 0.95
-                upper_bound = 1.05
-                mask = ((df_test['bumper_mat'].str[:9] == self.material1_dropdown.currentText()[:9]) &  # allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials
-                        (df_test['bumper_thick'] >= lower_bound * float(self.thickness1_entry.text())) &
-                        (df_test['bumper_thick'] <= upper_bound * float(self.thickness1_entry.text())) &
-                        (df_test['standoff'] >= lower_bound * float(self.standoff_entry.text())) &
-                        (df_test['standoff'] <= upper_bound * float(self.standoff_entry.text())) &
-                        (df_test['wall_mat'].str[:9] == self.material2_dropdown.currentText()[:9]) &  # allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials
-                        (df_test['wall_thick'] >= lower_bound * float(self.thickness2_entry.text())) &
-                        (df_test['wall_thick'] <= upper_bound * float(self.thickness2_entry.text())) &
-                        (df_test['angle'] == float(self.angle_entry.text())))
-                df_filtered_test_data = df_test[mask]
+                matcher = self.packages['load_test_matcher'](filename, root_dir)
+
+                ## Filter the test data based on the selected values (materials are matched on their first 9 characters,
+                ## which allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials)
+                df_filtered_test_data = matcher.match(
+                    materials={'bumper_mat': self.material1_dropdown.currentText(), 'wall_mat': self.material2_dropdown.currentText()},
+                    ranges={'bumper_thick': float(self.thickness1_entry.text()), 'standoff': float(self.standoff_entry.text()), 'wall_thick': float(self.thickness2_entry.text())},
+                    equal={'angle': float(self.angle_entry.text())},
+                    tolerance=0.05)
                 df_NP = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 0]
                 df_P = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 1]
                 ax.scatter(df_NP['velocity'],df_NP['proj_diam'],edgecolors='black',facecolors='black',label='NP')
@@ -496,6 +504,7 @@ class MyApp(QWidget):
 
             ## Draw the plot
             self.plot_window.canvas.draw()
+            self.plot_window.status_label.setText(f"Ballistic limit curves: {', '.join(cache_status)}")
 
             ## Show the plot window
             self.plot_window.show()
@@ -63,7 +63,8 @@ class PackageLoader(QThread):
         color_line_style_pairs = list(zip(colors, line_styles))
 
         ## Load the ballistic limit scripts
-        from BLE_singleWall import singleWall_performance
+        from curve_cache import CurveCache
+        from BLE_singleWall import singleWall_performance, singleWall_performance_vec
 
         ## Emit the loaded packages
         self.packages_loaded.emit({
@@ -77,7 +78,9 @@ class PackageLoader(QThread):
             'itertools': itertools,
             'pd': pd,
             'color_line_style_pairs': color_line_style_pairs,
-            'singleWall_performance': singleWall_performance
+            'curve_cache': CurveCache(os.path.join(root_dir, "cache", "curves")),
+            'singleWall_performance': singleWall_performance,
+            'singleWall_performance_vec': singleWall_performance_vec
         })
 
 ## ------------------------------------------------- ##
@@ -105,6 +108,10 @@ class PlotWindow(QDialog):
         self.layout.addWidget(self.toolbar)
         self.layout.addWidget(self.canvas)
 
+        # Add a status line below the plot (e.g. whether the curves were served from the curve cache)
+        self.status_label = QLabel(self)
+        self.layout.addWidget(self.status_label)
+
         # Set the layout for the window
         self.setLayout(self.layout)
 
@@ -401,13 +408,15 @@ class MyApp(QWidget):
 
             ## Call the ballistic limit equation
             velocities = self.packages['np'].linspace(0.1, 15, 150)  # units = km/s
-            df_plot = pd.DataFrame(self.packages['np'].repeat(df.values, len(velocities), axis=0), columns=df.columns)
-            df_plot['velocity'] = velocities
+            df_plot = pd.DataFrame({'velocity': velocities})
             pltmax = 0
-            df_config = df_plot.iloc[[0]].drop(columns=['velocity']) 
+            cache_status = []
+            df_config = df.iloc[[0]].copy()
             df_results = df_plot[['velocity']].copy()
             color, line_style = next(color_line_style_cycler)
-            df_plot['dc_BLE'] = df_plot.apply(self.packages['singleWall_performance'],axis=1)
+            dc, hits = self.packages['curve_cache'].evaluate(self.packages['singleWall_performance_vec'], df, velocities, vectorized=True)
+            df_plot['dc_BLE'] = dc[0]
+            cache_status.append(f"dc_BLE (cache {'hit' if hits.all() else 'miss'})")
             ax.plot(df_plot['velocity'],df_plot['dc_BLE'],color=color,linestyle=line_style,label='BLE')
             pltmax = max(pltmax, df_plot['dc_BLE'][len(velocities)/2])
             df_results.insert(len(df_results.columns), 'dc_BLE', df_plot['dc_BLE'])
@@ -419,6 +428,7 @@ class MyApp(QWidget):
 
             ## Draw the plot
             self.plot_window.canvas.draw()
+            self.plot_window.status_label.setText(f"Ballistic limit curves: {', '.join(cache_status)}")
 
             ## Show the plot window
             self.plot_window.show()
@@ -62,11 +62,13 @@ class PackageLoader(QThread):
         color_line_style_pairs = list(zip(colors, line_styles))
 
         ## Load the ballistic limit scripts
-        from BLE_JSCwhipple_mod import modJSCwhipple_performance
-        from BLE_JSCwhipple import JSCwhipple_performance
-        from BLE_reimerdeswhipple import reimerdes_performance
-        from BLE_NNOwhipple import NNO_performance
-        from BLE_modNNOwhipple import modNNO_performance
+        from curve_cache import CurveCache
+        from test_data import load_test_matcher
+        from BLE_JSCwhipple_mod import modJSCwhipple_performance, modJSCwhipple_performance_vec
+        from BLE_JSCwhipple import JSCwhipple_performance, JSCwhipple_performance_vec
+        from BLE_reimerdeswhipple import reimerdes_performance, reimerdes_performance_vec
+        from BLE_NNOwhipple import NNO_performance, NNO_performance_vec
+        from BLE_modNNOwhipple import modNNO_performance, modNNO_performance_vec
 
         ## Emit the loaded packages
         self.packages_loaded.emit({
@@ -80,11 +82,18 @@ class PackageLoader(QThread):
             'itertools': itertools,
             'pd': pd,
             'color_line_style_pairs': color_line_style_pairs,
+            'curve_cache': CurveCache(os.path.join(root_dir, "cache", "curves")),
+            'load_test_matcher': load_test_matcher,
             'modJSCwhipple_performance': modJSCwhipple_performance,
+            'modJSCwhipple_performance_vec': modJSCwhipple_performance_vec,
             'JSCwhipple_performance': JSCwhipple_performance,
+            'JSCwhipple_performance_vec': JSCwhipple_performance_vec,
             'reimerdes_performance': reimerdes_performance,
+            'reimerdes_performance_vec': reimerdes_performance_vec,
             'NNO_performance': NNO_performance,
-            'modNNO_performance': modNNO_performance
+            'NNO_performance_vec': NNO_performance_vec,
+            'modNNO_performance': modNNO_performance,
+            'modNNO_performance_vec': modNNO_performance_vec
         })
 
 ## ------------------------------------------------- ##
@@ -112,6 +121,10 @@ class PlotWindow(QDialog):
         self.layout.addWidget(self.toolbar)
         self.layout.addWidget(self.canvas)
 
+        ## Add a status line below the plot (e.g. whether the curves were served from the curve cache)
+        self.status_label = QLabel(self)
+        self.layout.addWidget(self.status_label)
+
         ## Set the layout for the window
         self.setLayout(self.layout)
 
@@ -439,35 +452,45 @@ class MyApp(QWidget):
 
             ## Call the ballistic limit equation
             velocities = self.packages['np'].linspace(0.1, 15, 150)  # units = km/s
-            df_plot = pd.DataFrame(self.packages['np'].repeat(df.values, len(velocities), axis=0), columns=df.columns)
-            df_plot['velocity'] = velocities
+            df_plot = pd.DataFrame({'velocity': velocities})
             pltmax = 0
-            df_config = df_plot.iloc[[0]].drop(columns=['velocity']) 
+            cache_status = []
+            df_config = df.iloc[[0]].copy()
             df_results = df_plot[['velocity']].copy()
             for item in self.list_widget.selectedItems():
                 color, line_style = next(color_line_style_cycler)
                 if item.text() == "New non-optimum (NNO)":
-                    df_plot['dc_NNO'] = df_plot.apply(self.packages['NNO_performance'],axis=1)
+                    dc, hits = self.packages['curve_cache'].evaluate(self.packages['NNO_performance_vec'], df, velocities, vectorized=True)
+                    df_plot['dc_NNO'] = dc[0]
+                    cache_status.append(f"dc_NNO (cache {'hit' if hits.all() else 'miss'})")
                     ax.plot(df_plot['velocity'],df_plot['dc_NNO'],color=color,linestyle=line_style,label='New non-optimum (NNO)')
                     pltmax = max(pltmax, df_plot['dc_NNO'][len(velocities)/2])
                     df_results.insert(len(df_results.columns), 'dc_NNO', df_plot['dc_NNO'])
                 elif item.text() == "Christiansen-modified NNO":
-                    df_plot['dc_modNNO'] = df_plot.apply(self.packages['modNNO_performance'],axis=1)
+                    dc, hits = self.packages['curve_cache'].evaluate(self.packages['modNNO_performance_vec'], df, velocities, vectorized=True)
+                    df_plot['dc_modNNO'] = dc[0]
+                    cache_status.append(f"dc_modNNO (cache {'hit' if hits.all() else 'miss'})")
                     ax.plot(df_plot['velocity'],df_plot['dc_modNNO'],color=color,linestyle=line_style,label='Christiansen-modified NNO')
                     pltmax = max(pltmax, df_plot['dc_modNNO'][len(velocities)/2])
                     df_results.insert(len(df_results.columns), 'dc_modNNO', df_plot['dc_modNNO'])
                 elif item.text() == "Reimerdes-modified NNO":
-                    df_plot['dc_reimerdes'] = df_plot.apply(self.packages['reimerdes_performance'],axis=1)
+                    dc, hits = self.packages['curve_cache'].evaluate(self.packages['reimerdes_performance_vec'], df, velocities, vectorized=True)
+                    df_plot['dc_reimerdes'] = dc[0]
+                    cache_status.append(f"dc_reimerdes (cache {'hit' if hits.all() else 'miss'})")
                     ax.plot(df_plot['velocity'],df_plot['dc_reimerdes'],color=color,linestyle=line_style,label='Reimerdes')
                     pltmax = max(pltmax, df_plot['dc_reimerdes'][len(velocities)/2])
                     df_results.insert(len(df_results.columns), 'dc_reimerdes', df_plot['dc_reimerdes'])
                 elif item.text() == "JSC Whipple":
-                    df_plot['dc_JSCwhipple'] = df_plot.apply(self.packages['JSCwhipple_performance'],axis=1)
+                    dc, hits = self.packages['curve_cache'].evaluate(self.packages['JSCwhipple_performance_vec'], df, velocities, vectorized=True)
+                    df_plot['dc_JSCwhipple'] = dc[0]
+                    cache_status.append(f"dc_JSCwhipple (cache {'hit' if hits.all() else 'miss'})")
                     ax.plot(df_plot['velocity'],df_plot['dc_JSCwhipple'],color=color,linestyle=line_style,label='JSC Whipple')
                     pltmax = max(pltmax, df_plot['dc_JSCwhipple'][len(velocities)/2])
                     df_results.insert(len(df_results.columns), 'dc_JSCwhipple', df_plot['dc_JSCwhipple'])
                 elif item.text() == "JSC Whipple (mod)":
-                    df_plot['dc_modJSCwhipple'] = df_plot.apply(self.packages['modJSCwhipple_performance'],axis=1)
+                    dc, hits = self.packages['curve_cache'].evaluate(self.packages['modJSCwhipple_performance_vec'], df, velocities, vectorized=True)
+                    df_plot['dc_modJSCwhipple'] = dc[0]
+                    cache_status.append(f"dc_modJSCwhipple (cache {'hit' if hits.all() else 'miss'})")
                     ax.plot(df_plot['velocity'],df_plot['dc_modJSCwhipple'],color=color,linestyle=line_style,label='JSC Whipple (mod)')  
                     pltmax = max(pltmax, df_plot['dc_modJSCwhipple'][len(velocities)/2])  
                     df_results.insert(len(df_results.columns), 'dc_modJSCwhipple', df_plot['dc_modJSCwhipple'])
@@ -476,21 +499,15 @@ class MyApp(QWidget):
             if self.plot_test_data_checkbox.isChecked():
                 ## Load the test data
                 filename = 'database_whipple_pyBLOSSUM.csv'
-                df_test = pd.read_csv(os.path.join(root_dir,'data',filename),skiprows=[1])
-                
-                ## Filter the test data based on the selected values
-                lower_bound = 0.95
-                upper_bound = 1.05
-                mask = ((df_test['bumper_mat'].str[:9] == self.material1_dropdown.currentText()[:9]) &  # allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials
-                        (df_test['bumper_thick'] >= lower_bound * float(self.thickness1_entry.text())) &
-                        (df_test['bumper_thick'] <= upper_bound * float(self.thickness1_entry.text())) &
-                        (df_test['standoff'] >= lower_bound * float(self.standoff_entry.text())) &
-                        (df_test['standoff'] <= upper_bound * float(self.standoff_entry.text())) &
-                        (df_test['wall_mat'].str[:9] == self.material2_dropdown.currentText()[:9]) &  # allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials
-                        (df_test['wall_thick'] >= lower_bound * float(self.thickness2_entry.text())) &
-                        (df_test['wall_thick'] <= upper_bound * float(self.thickness2_entry.text())) &
-                        (df_test['angle'] == float(self.angle_entry.text())))
-                df_filtered_test_data = df_test[mask]
+                matcher = self.packages['load_test_matcher'](filename, root_dir)
+
+                ## Filter the test data based on the selected values (materials are matched on their first 9 characters,
+                ## which allows for e.g., AA6061-T651 and AA6061-T6 to be handled as common materials)
+                df_filtered_test_data = matcher.match(
+                    materials={'bumper_mat': self.material1_dropdown.currentText(), 'wall_mat': self.material2_dropdown.currentText()},
+                    ranges={'bumper_thick': float(self.thickness1_entry.text()), 'standoff': float(self.standoff_entry.text()), 'wall_thick': float(self.thickness2_entry.text())},
+                    equal={'angle': float(self.angle_entry.text())},
+                    tolerance=0.05)
                 df_NP = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 0]
                 df_P = df_filtered_test_data[df_filtered_test_data['perforated_class'] == 1]
                 ax.scatter(df_NP['velocity'],df_NP['proj_diam'],edgecolors='black',facecolors='black',label='NP')
@@ -503,6 +520,7 @@ class MyApp(QWidget):
 
             ## Draw the plot
             self.plot_window.canvas.draw()
+            self.plot_window.status_label.setText(f"Ballistic limit curves: {', '.join(cache_status)}")
 
             ## Show the plot window
             self.plot_window.show()